@@ -3,185 +3,232 @@
 Script to analyze recent candles and determine if trades should have been executed.
 """
 import asyncio
+import sys
+import numpy as np
 import pandas as pd
-import yaml
 from datetime import datetime
+from functools import lru_cache
 
 # Import bot modules
-from bot.data.market_data import MarketData
+from bot.core.config import load_config
+from bot.data.market_data import market_data
 from bot.data.indicators import Indicators
-from bot.regime.regime_classifier import RegimeClassifier
+from bot.regime.regime_classifier import RegimeClassifier, Regime
 from bot.strategies.trend_pullback import TrendPullbackStrategy
 from bot.strategies.range_meanrev import RangeMeanReversionStrategy
 
 
-def load_config():
-    with open("config.yaml", "r") as f:
-        return yaml.safe_load(f)
+# Indicator columns read by the analysis printout (missing ones default to 0)
+INDICATOR_COLS = ['ADX_14', 'EMA_20', 'EMA_50', 'EMA_SEP', 'RSI_14', 'BBU_20_2.0', 'BBL_20_2.0', 'BB_WIDTH']
+
+# Precomputed trend pullback conditions (see Indicators.add_trend_conditions)
+TREND_CONDITION_COLS = [
+    'PULLBACK_BULL', 'BOUNCE_BULL', 'RSI_OK_BULL', 'TRENDED_ABOVE',
+    'PULLBACK_BEAR', 'BOUNCE_BEAR', 'RSI_OK_BEAR', 'TRENDED_BELOW',
+]
+
+# Fallbacks for columns the explain_* helpers read when an indicator failed
+TAIL_DEFAULTS = {'RSI_14': 50.0, **dict.fromkeys(TREND_CONDITION_COLS, False)}
+
+# Everything the printout, regime classifier and strategies read from the frame
+ANALYSIS_COLS = (['timestamp', 'open', 'high', 'low', 'close'] + INDICATOR_COLS
+                 + ['BBM_20_2.0', 'ATR_14'] + TREND_CONDITION_COLS)
+
+# Timeframe used for regime detection and signal generation (kept at full precision)
+SIGNAL_TIMEFRAME = '1h'
+
+
+@lru_cache(maxsize=1)
+def get_analyzers():
+    """Builds the regime classifier and strategies once per process."""
+    config = load_config("config.yaml")
+    return (
+        RegimeClassifier(config),
+        TrendPullbackStrategy(config),
+        RangeMeanReversionStrategy(config),
+    )
+
+
+def last_records(df: pd.DataFrame, n: int) -> np.recarray:
+    """Returns the last n rows as a record array, filling in missing indicator columns."""
+    fill = {col: 0.0 for col in INDICATOR_COLS if col not in df.columns}
+    fill.update({col: value for col, value in TAIL_DEFAULTS.items() if col not in df.columns})
+    return df.tail(n).assign(**fill).to_records(index=False)
 
 
 async def fetch_and_analyze():
-    config = load_config()
-    market_data = MarketData()
-    regime_classifier = RegimeClassifier(config)
-    trend_strategy = TrendPullbackStrategy(config)
-    range_strategy = RangeMeanReversionStrategy(config)
+    regime_classifier, trend_strategy, range_strategy = get_analyzers()
+
+    # Tradeable regime -> (strategy, label for the no-signal message, explainer)
+    handlers = {
+        Regime.TREND_BULL: (trend_strategy, "Trend pullback", explain_trend_signal),
+        Regime.TREND_BEAR: (trend_strategy, "Trend pullback", explain_trend_signal),
+        Regime.RANGE: (range_strategy, "Mean reversion", explain_range_signal),
+    }
 
     symbols = ['BTC/USDT', 'ETH/USDT']
     timeframes = ['1h', '4h', '1d']
 
+    # Fetch all symbol/timeframe pairs concurrently (bounded to respect exchange rate limits)
+    sem = asyncio.Semaphore(4)
+
+    async def fetch(symbol, tf):
+        # Fetch enough candles for indicators (need at least 50 for EMA_50)
+        limit = 100 if tf == '1h' else 50
+        async with sem:
+            return await market_data.get_candles(symbol, tf, limit=limit)
+
+    pairs = [(symbol, tf) for symbol in symbols for tf in timeframes]
+    results = await asyncio.gather(*(fetch(symbol, tf) for symbol, tf in pairs))
+    candles = dict(zip(pairs, results))
+
     for symbol in symbols:
-        print(f"\n{'='*60}")
-        print(f"  {symbol}")
-        print(f"{'='*60}")
+        # Buffer each symbol's report and write it in one go
+        out = [f"\n{'='*60}", f"  {symbol}", f"{'='*60}"]
 
         for tf in timeframes:
-            print(f"\n--- {tf} Timeframe ---")
+            out.append(f"\n--- {tf} Timeframe ---")
 
-            # Fetch enough candles for indicators (need at least 50 for EMA_50)
-            limit = 100 if tf == '1h' else 50
-            df = await market_data.get_candles(symbol, tf, limit=limit)
+            df = candles[(symbol, tf)]
 
             if df.empty:
-                print(f"  No data for {tf}")
+                out.append(f"  No data for {tf}")
                 continue
 
-            # Add indicators
+            # Add indicators, then keep only the columns the analysis reads
             df = Indicators.add_all(df)
+            df = df[[col for col in ANALYSIS_COLS if col in df.columns]]
+            if tf != SIGNAL_TIMEFRAME:
+                # Display-only timeframes don't need float64 precision
+                df = df.astype({col: 'float32' for col in df.columns if df[col].dtype == 'float64'})
 
             # Get last few candles
-            last_candles = df.tail(5)
+            last_candles = df[['timestamp', 'open', 'high', 'low', 'close']].tail(3)
 
-            print(f"\n  Last 3 candles:")
-            for idx, row in last_candles.tail(3).iterrows():
-                ts = row['timestamp'].strftime('%Y-%m-%d %H:%M')
-                print(f"    {ts} | O:{row['open']:.2f} H:{row['high']:.2f} L:{row['low']:.2f} C:{row['close']:.2f}")
+            out.append(f"\n  Last 3 candles:")
+            for ts, o, h, l, c in last_candles.itertuples(index=False, name=None):
+                out.append(f"    {ts.strftime('%Y-%m-%d %H:%M')} | O:{o:.2f} H:{h:.2f} L:{l:.2f} C:{c:.2f}")
 
             # Show key indicators for latest candle
-            latest = df.iloc[-1]
-            print(f"\n  Latest Indicators:")
-
-            print(f"    ADX_14: {latest.get('ADX_14', 0):.2f}")
-            print(f"    EMA_20: {latest.get('EMA_20', 0):.2f}")
-            print(f"    EMA_50: {latest.get('EMA_50', 0):.2f}")
-            print(f"    EMA_SEP: {latest.get('EMA_SEP', 0):.2f}%")
-            print(f"    RSI_14: {latest.get('RSI_14', 0):.2f}")
-            print(f"    BB Upper: {latest.get('BBU_20_2.0', 0):.2f}")
-            print(f"    BB Lower: {latest.get('BBL_20_2.0', 0):.2f}")
-            print(f"    BB Width: {latest.get('BB_WIDTH', 0):.4f}")
+            # Single label->position resolution for all displayed indicators
+            adx, ema20, ema50, ema_sep, rsi, bbu, bbl, bbw = (
+                df.iloc[-1].reindex(INDICATOR_COLS, fill_value=0.0).to_numpy(dtype='float64')
+            )
+            out.append(f"\n  Latest Indicators:")
+
+            out.append(f"    ADX_14: {adx:.2f}")
+            out.append(f"    EMA_20: {ema20:.2f}")
+            out.append(f"    EMA_50: {ema50:.2f}")
+            out.append(f"    EMA_SEP: {ema_sep:.2f}%")
+            out.append(f"    RSI_14: {rsi:.2f}")
+            out.append(f"    BB Upper: {bbu:.2f}")
+            out.append(f"    BB Lower: {bbl:.2f}")
+            out.append(f"    BB Width: {bbw:.4f}")
 
             # Only analyze 1h timeframe for trade signals (as per bot config)
-            if tf == '1h':
+            if tf == SIGNAL_TIMEFRAME:
                 # Detect regime
                 regime_result = regime_classifier.detect_regime(df, symbol)
                 regime = regime_result['regime']
                 confidence = regime_result['confidence']
                 features = regime_result['features']
 
-                print(f"\n  Regime Detection:")
-                print(f"    Regime: {regime}")
-                print(f"    Confidence: {confidence:.2f}")
-                print(f"    ADX Threshold (High): {features['adx_threshold_high']:.2f}")
-                print(f"    BB Width Threshold (Low): {features['bw_threshold_low']:.4f}")
+                out.append(f"\n  Regime Detection:")
+                out.append(f"    Regime: {regime}")
+                out.append(f"    Confidence: {confidence:.2f}")
+                out.append(f"    ADX Threshold (High): {features['adx_threshold_high']:.2f}")
+                out.append(f"    BB Width Threshold (Low): {features['bw_threshold_low']:.4f}")
 
                 # Check for signals based on regime
-                print(f"\n  Signal Analysis:")
+                out.append(f"\n  Signal Analysis:")
 
-                if regime == "NO_TRADE":
-                    print(f"    Result: NO TRADE - Market conditions unclear")
-                    explain_no_trade(df, features)
-                elif "TREND" in regime:
-                    signal = trend_strategy.generate_signal(df, regime)
-                    if signal['side'] != "NONE":
-                        print(f"    SIGNAL FOUND!")
-                        print(f"      Side: {signal['side']}")
-                        print(f"      Entry: {signal['entry_price']:.2f}")
-                        print(f"      Stop Loss: {signal['stop_loss']:.2f}")
-                        print(f"      Take Profit: {signal['take_profit']:.2f}")
-                        print(f"      Reason: {signal['reason']}")
-                    else:
-                        print(f"    Result: NO SIGNAL - Trend pullback conditions not met")
-                        explain_trend_signal(df, regime)
-                elif regime == "RANGE":
-                    signal = range_strategy.generate_signal(df, regime)
+                # Last two bars, shared by the explain_* helpers
+                tail = last_records(df, 2)
+
+                if regime == Regime.NO_TRADE:
+                    out.append(f"    Result: NO TRADE - Market conditions unclear")
+                    explain_no_trade(tail, features, out)
+                elif regime in handlers:
+                    strategy, label, explain = handlers[regime]
+                    signal = strategy.generate_signal(df, regime)
                     if signal['side'] != "NONE":
-                        print(f"    SIGNAL FOUND!")
-                        print(f"      Side: {signal['side']}")
-                        print(f"      Entry: {signal['entry_price']:.2f}")
-                        print(f"      Stop Loss: {signal['stop_loss']:.2f}")
-                        print(f"      Take Profit: {signal['take_profit']:.2f}")
-                        print(f"      Reason: {signal['reason']}")
+                        out.append(f"    SIGNAL FOUND!")
+                        out.append(f"      Side: {signal['side']}")
+                        out.append(f"      Entry: {signal['entry_price']:.2f}")
+                        out.append(f"      Stop Loss: {signal['stop_loss']:.2f}")
+                        out.append(f"      Take Profit: {signal['take_profit']:.2f}")
+                        out.append(f"      Reason: {signal['reason']}")
                     else:
-                        print(f"    Result: NO SIGNAL - Mean reversion conditions not met")
-                        explain_range_signal(df)
+                        out.append(f"    Result: NO SIGNAL - {label} conditions not met")
+                        explain(tail, regime, out)
 
+        sys.stdout.write("\n".join(out) + "\n")
 
-def explain_no_trade(df, features):
+
+def explain_no_trade(tail, features, out):
     """Explain why NO_TRADE regime was detected."""
-    current = df.iloc[-1]
-    adx = current.get('ADX_14', 0)
-    bb_width = current.get('BB_WIDTH', 0)
+    current = tail[-1]
+    adx = current['ADX_14']
+    bb_width = current['BB_WIDTH']
 
-    print(f"\n    Why NO_TRADE regime:")
-    print(f"      - ADX ({adx:.2f}) not > {features['adx_threshold_high']:.2f} (for TREND)")
-    print(f"      - ADX ({adx:.2f}) not < 40th percentile OR BB_WIDTH ({bb_width:.4f}) not < {features['bw_threshold_low']:.4f} (for RANGE)")
+    out.append(f"\n    Why NO_TRADE regime:")
+    out.append(f"      - ADX ({adx:.2f}) not > {features['adx_threshold_high']:.2f} (for TREND)")
+    out.append(f"      - ADX ({adx:.2f}) not < 40th percentile OR BB_WIDTH ({bb_width:.4f}) not < {features['bw_threshold_low']:.4f} (for RANGE)")
 
 
-def explain_trend_signal(df, regime):
+def explain_trend_signal(tail, regime, out):
     """Explain why trend pullback signal wasn't generated."""
-    current = df.iloc[-1]
-    prev = df.iloc[-2]
-    prev2 = df.iloc[-3]
+    prev, current = tail[-2], tail[-1]
 
-    ema20 = current.get('EMA_20', 0)
-    prev_ema20 = prev.get('EMA_20', 0)
-    rsi = current.get('RSI_14', 50)
+    ema20 = current['EMA_20']
+    prev_ema20 = prev['EMA_20']
+    rsi = current['RSI_14']
     close = current['close']
 
-    print(f"\n    Why no signal (Trend Pullback):")
+    out.append(f"\n    Why no signal (Trend Pullback):")
 
-    if "BULL" in regime:
-        pullback = prev['low'] < ema20
-        bounce = close > ema20 and current['low'] < ema20 * 1.002
-        rsi_ok = rsi < 70
-        was_above = prev2['close'] > df.iloc[-3].get('EMA_20', 0)
+    if regime == Regime.TREND_BULL:
+        pullback = current['PULLBACK_BULL']
+        bounce = current['BOUNCE_BULL']
+        rsi_ok = current['RSI_OK_BULL']
+        was_above = current['TRENDED_ABOVE']
 
         if not pullback:
-            print(f"      - No pullback: Prev low ({prev['low']:.2f}) not < EMA20 ({prev_ema20:.2f})")
+            out.append(f"      - No pullback: Prev low ({prev['low']:.2f}) not < EMA20 ({prev_ema20:.2f})")
         if not bounce:
-            print(f"      - No bounce confirmation: Close ({close:.2f}) vs EMA20 ({ema20:.2f})")
+            out.append(f"      - No bounce confirmation: Close ({close:.2f}) vs EMA20 ({ema20:.2f})")
         if not rsi_ok:
-            print(f"      - RSI overbought: {rsi:.1f} >= 70")
+            out.append(f"      - RSI overbought: {rsi:.1f} >= 70")
         if not was_above:
-            print(f"      - Wasn't trending above EMA20 before pullback")
+            out.append(f"      - Wasn't trending above EMA20 before pullback")
     else:  # BEAR
-        pullback = prev['high'] > ema20
-        bounce = close < ema20 and current['high'] > ema20 * 0.998
-        rsi_ok = rsi > 30
-        was_below = prev2['close'] < df.iloc[-3].get('EMA_20', 0)
+        pullback = current['PULLBACK_BEAR']
+        bounce = current['BOUNCE_BEAR']
+        rsi_ok = current['RSI_OK_BEAR']
+        was_below = current['TRENDED_BELOW']
 
         if not pullback:
-            print(f"      - No rally: Prev high ({prev['high']:.2f}) not > EMA20 ({prev_ema20:.2f})")
+            out.append(f"      - No rally: Prev high ({prev['high']:.2f}) not > EMA20 ({prev_ema20:.2f})")
         if not bounce:
-            print(f"      - No rejection confirmation: Close ({close:.2f}) vs EMA20 ({ema20:.2f})")
+            out.append(f"      - No rejection confirmation: Close ({close:.2f}) vs EMA20 ({ema20:.2f})")
         if not rsi_ok:
-            print(f"      - RSI oversold: {rsi:.1f} <= 30")
+            out.append(f"      - RSI oversold: {rsi:.1f} <= 30")
         if not was_below:
-            print(f"      - Wasn't trending below EMA20 before rally")
+            out.append(f"      - Wasn't trending below EMA20 before rally")
 
 
-def explain_range_signal(df):
+def explain_range_signal(tail, regime, out):
     """Explain why range mean reversion signal wasn't generated."""
-    current = df.iloc[-1]
+    current = tail[-1]
 
-    upper = current.get('BBU_20_2.0', 0)
-    lower = current.get('BBL_20_2.0', 0)
-    rsi = current.get('RSI_14', 50)
+    upper = current['BBU_20_2.0']
+    lower = current['BBL_20_2.0']
+    rsi = current['RSI_14']
     close = current['close']
     high = current['high']
     low = current['low']
 
-    print(f"\n    Why no signal (Mean Reversion):")
+    out.append(f"\n    Why no signal (Mean Reversion):")
 
     # Check for buy signal conditions
     touched_lower = low < lower
@@ -189,11 +236,11 @@ def explain_range_signal(df):
     rsi_oversold = rsi < 40
 
     if not touched_lower:
-        print(f"      - Price didn't touch lower BB (Low: {low:.2f} not < {lower:.2f})")
+        out.append(f"      - Price didn't touch lower BB (Low: {low:.2f} not < {lower:.2f})")
     elif not closed_above_lower:
-        print(f"      - Closed below lower BB (Close: {close:.2f} not > {lower:.2f})")
+        out.append(f"      - Closed below lower BB (Close: {close:.2f} not > {lower:.2f})")
     elif not rsi_oversold:
-        print(f"      - RSI not oversold ({rsi:.1f} not < 40)")
+        out.append(f"      - RSI not oversold ({rsi:.1f} not < 40)")
 
     # Check for sell signal conditions
     touched_upper = high > upper
@@ -201,11 +248,11 @@ def explain_range_signal(df):
     rsi_overbought = rsi > 60
 
     if not touched_upper:
-        print(f"      - Price didn't touch upper BB (High: {high:.2f} not > {upper:.2f})")
+        out.append(f"      - Price didn't touch upper BB (High: {high:.2f} not > {upper:.2f})")
     elif not closed_below_upper:
-        print(f"      - Closed above upper BB (Close: {close:.2f} not < {upper:.2f})")
+        out.append(f"      - Closed above upper BB (Close: {close:.2f} not < {upper:.2f})")
     elif not rsi_overbought:
-        print(f"      - RSI not overbought ({rsi:.1f} not > 60)")
+        out.append(f"      - RSI not overbought ({rsi:.1f} not > 60)")
 
 
 if __name__ == "__main__":
@@ -214,4 +261,11 @@ if __name__ == "__main__":
     print(f"  Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     print("="*60)
 
+    if sys.platform != "win32":
+        try:
+            import uvloop
+            uvloop.install()
+        except ImportError:
+            pass
+
     asyncio.run(fetch_and_analyze())
@@ -1,17 +1,71 @@
 import os
+import asyncio
 import logging
+from typing import Optional
 import httpx
-from dotenv import load_dotenv
+from bot.core.config import load_env
 
 logger = logging.getLogger(__name__)
 
+MAX_QUEUE_SIZE = 256
+MAX_SEND_ATTEMPTS = 3
+
+# Message templates (bound str.format so the layout is parsed once at import)
+_TRADE_OPENED = (
+    "{emoji} <b>Trade Opened</b>\n"
+    "Symbol: <code>{symbol}</code>\n"
+    "Side: {side}\n"
+    "Size: {size:.4f}\n"
+    "Entry: ${entry_price:,.2f}\n"
+    "SL: ${stop_loss:,.2f}\n"
+    "TP: ${take_profit:,.2f}"
+).format
+_TRADE_CLOSED_HEADER = (
+    "{emoji} <b>Trade Closed</b>\n"
+    "━━━━━━━━━━━━━━━━━━\n"
+    "Symbol: <code>{symbol}</code>\n"
+    "Side: {side}\n"
+).format
+_KILL_SWITCH = (
+    "🚨 <b>KILL-SWITCH ACTIVATED</b> 🚨\n\n"
+    "Reason: {reason}\n\n"
+    "<i>All trading has been halted. Manual intervention required.</i>"
+).format
+_ERROR = (
+    "⚠️ <b>Error in {component}</b>\n"
+    "<code>{error}</code>"
+).format
+_RECONCILIATION = (
+    "🔧 <b>Reconciliation Alert</b>\n"
+    "Symbol: <code>{symbol}</code>\n"
+    "Issue: {issue}\n"
+    "Action: {action}"
+).format
+_STARTUP = (
+    "🚀 <b>Trading Bot Started</b>\n"
+    "Mode: {mode}\n"
+    "Symbols: {symbols}\n"
+    "Leverage: {leverage}x\n"
+    "Risk/Trade: {risk_pct}%"
+).format
+_SHUTDOWN = (
+    "🛑 <b>Trading Bot Stopped</b>\n"
+    "Reason: {reason}\n"
+    "Positions Closed: {positions_closed}"
+).format
+
 
 class TelegramAlerter:
     def __init__(self):
-        load_dotenv()
+        load_env()
         self.bot_token = os.getenv("TG_BOT_TOKEN")
         self.chat_id = os.getenv("TG_CHAT_ID")
         self._enabled = bool(self.bot_token and self.chat_id)
+        self._url = f"https://api.telegram.org/bot{self.bot_token}/sendMessage"
+        self._base_payload = {"chat_id": self.chat_id, "parse_mode": "HTML"}
+        self._client: Optional[httpx.AsyncClient] = None
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=MAX_QUEUE_SIZE)
+        self._worker: Optional[asyncio.Task] = None
 
         if not self._enabled:
             logger.warning("Telegram alerts disabled: TG_BOT_TOKEN or TG_CHAT_ID not set")
@@ -20,28 +74,101 @@ class TelegramAlerter:
     def is_enabled(self) -> bool:
         return self._enabled
 
-    async def send_message(self, message: str, parse_mode: str = "HTML") -> bool:
-        """Sends a message to the configured Telegram chat."""
+    async def _get_client(self) -> httpx.AsyncClient:
+        """Returns the shared HTTP client, creating it on first use."""
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                http2=True,
+                timeout=10,
+                limits=httpx.Limits(max_keepalive_connections=4)
+            )
+        return self._client
+
+    async def aclose(self):
+        """Flushes pending alerts, stops the sender task and closes the HTTP client."""
+        await self.flush()
+        if self._worker is not None:
+            self._worker.cancel()
+            self._worker = None
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            logger.info("Telegram client connection closed")
+
+    async def send_message(self, message: str, parse_mode: str = "HTML", critical: bool = False) -> bool:
+        """
+        Queues a message for the configured Telegram chat.
+
+        Delivery happens on a background task so callers never wait on the
+        Telegram API. Critical messages are never dropped when the queue is full.
+        """
         if not self._enabled:
             logger.info(f"Telegram disabled, would send: {message[:100]}...")
             return False
 
-        url = f"https://api.telegram.org/bot{self.bot_token}/sendMessage"
-        payload = {
-            "chat_id": self.chat_id,
-            "text": message,
-            "parse_mode": parse_mode
-        }
+        # Payloads sit in the queue, so each send gets its own copy of the base dict
+        payload = {**self._base_payload, "text": message}
+        if parse_mode != "HTML":
+            payload["parse_mode"] = parse_mode
+
+        if self._queue.full() and not self._drop_oldest_non_critical():
+            logger.warning(f"Telegram queue full, dropping message: {message[:100]}...")
+            return False
+
+        self._queue.put_nowait((payload, critical))
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._drain())
+        return True
 
+    async def flush(self, timeout: float = 15.0):
+        """Waits until all queued messages have been sent (or timeout)."""
+        if self._worker is None or self._worker.done():
+            return
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(url, json=payload, timeout=10)
-                if response.status_code == 200:
-                    logger.info("Telegram message sent successfully")
-                    return True
-                else:
-                    logger.error(f"Telegram API error: {response.status_code} - {response.text}")
-                    return False
+            await asyncio.wait_for(self._queue.join(), timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Timed out flushing Telegram queue ({self._queue.qsize()} pending)")
+
+    def _drop_oldest_non_critical(self) -> bool:
+        """Removes the oldest non-critical message from the queue. Returns True if one was dropped."""
+        pending = []
+        dropped = False
+        while not self._queue.empty():
+            item = self._queue.get_nowait()
+            self._queue.task_done()
+            if not dropped and not item[1]:
+                dropped = True
+                logger.warning(f"Telegram queue full, dropping oldest message: {item[0]['text'][:100]}...")
+                continue
+            pending.append(item)
+        for item in pending:
+            self._queue.put_nowait(item)
+        return dropped
+
+    async def _drain(self):
+        """Background consumer that delivers queued messages one at a time."""
+        while True:
+            payload, _ = await self._queue.get()
+            try:
+                for attempt in range(MAX_SEND_ATTEMPTS):
+                    if await self._post(payload):
+                        break
+                    if attempt < MAX_SEND_ATTEMPTS - 1:
+                        await asyncio.sleep(2 ** attempt)
+            finally:
+                self._queue.task_done()
+
+    async def _post(self, payload: dict) -> bool:
+        """Posts a single message to the Telegram API."""
+        try:
+            client = await self._get_client()
+            response = await client.post(self._url, json=payload)
+            if response.status_code == 200:
+                logger.info("Telegram message sent successfully")
+                return True
+            else:
+                logger.error(f"Telegram API error: {response.status_code} - {response.text}")
+                return False
         except Exception as e:
             logger.error(f"Failed to send Telegram message: {e}")
             return False
@@ -49,33 +176,29 @@ class TelegramAlerter:
     async def alert_trade_opened(self, symbol: str, side: str, size: float, entry_price: float,
                                   stop_loss: float, take_profit: float):
         """Alert when a new trade is opened."""
-        emoji = "🟢" if side == "BUY" else "🔴"
-        message = (
-            f"{emoji} <b>Trade Opened</b>\n"
-            f"Symbol: <code>{symbol}</code>\n"
-            f"Side: {side}\n"
-            f"Size: {size:.4f}\n"
-            f"Entry: ${entry_price:,.2f}\n"
-            f"SL: ${stop_loss:,.2f}\n"
-            f"TP: ${take_profit:,.2f}"
+        if not self._enabled:
+            return
+
+        message = _TRADE_OPENED(
+            emoji="🟢" if side == "BUY" else "🔴",
+            symbol=symbol, side=side, size=size,
+            entry_price=entry_price, stop_loss=stop_loss, take_profit=take_profit
         )
         await self.send_message(message)
 
     async def alert_trade_closed(self, symbol: str, side: str, pnl: float, exit_reason: str,
                                   entry_price: float = None, exit_price: float = None, fee: float = None):
         """Alert when a trade is closed."""
+        if not self._enabled:
+            return
+
         emoji = "💰" if pnl > 0 else "💸"
         pnl_sign = "+" if pnl > 0 else ""
 
         # Determine exit reason emoji
         reason_emoji = "✅" if exit_reason == "TP_HIT" else "❌" if exit_reason == "SL_HIT" else "🔄"
 
-        message = (
-            f"{emoji} <b>Trade Closed</b>\n"
-            f"━━━━━━━━━━━━━━━━━━\n"
-            f"Symbol: <code>{symbol}</code>\n"
-            f"Side: {side}\n"
-        )
+        message = _TRADE_CLOSED_HEADER(emoji=emoji, symbol=symbol, side=side)
 
         if entry_price:
             message += f"Entry: ${entry_price:,.2f}\n"
@@ -93,33 +216,33 @@ class TelegramAlerter:
 
     async def alert_kill_switch(self, reason: str):
         """Alert when kill-switch is activated."""
-        message = (
-            f"🚨 <b>KILL-SWITCH ACTIVATED</b> 🚨\n\n"
-            f"Reason: {reason}\n\n"
-            f"<i>All trading has been halted. Manual intervention required.</i>"
-        )
-        await self.send_message(message)
+        if not self._enabled:
+            return
+
+        message = _KILL_SWITCH(reason=reason)
+        await self.send_message(message, critical=True)
 
     async def alert_error(self, component: str, error: str):
         """Alert on critical errors."""
-        message = (
-            f"⚠️ <b>Error in {component}</b>\n"
-            f"<code>{error[:500]}</code>"
-        )
+        if not self._enabled:
+            return
+
+        message = _ERROR(component=component, error=error[:500])
         await self.send_message(message)
 
     async def alert_reconciliation_issue(self, symbol: str, issue: str, action: str):
         """Alert on reconciliation anomalies."""
-        message = (
-            f"🔧 <b>Reconciliation Alert</b>\n"
-            f"Symbol: <code>{symbol}</code>\n"
-            f"Issue: {issue}\n"
-            f"Action: {action}"
-        )
+        if not self._enabled:
+            return
+
+        message = _RECONCILIATION(symbol=symbol, issue=issue, action=action)
         await self.send_message(message)
 
     async def send_heartbeat(self, status: dict):
         """Send hourly heartbeat with performance stats."""
+        if not self._enabled:
+            return
+
         daily_pnl = status.get('daily_pnl', 0)
         pnl_emoji = "📈" if daily_pnl >= 0 else "📉"
         pnl_sign = "+" if daily_pnl > 0 else ""
@@ -171,17 +294,22 @@ class TelegramAlerter:
 
     async def alert_startup(self, config_summary: dict):
         """Alert when bot starts up."""
-        message = (
-            f"🚀 <b>Trading Bot Started</b>\n"
-            f"Mode: {config_summary.get('mode', 'UNKNOWN')}\n"
-            f"Symbols: {', '.join(config_summary.get('symbols', []))}\n"
-            f"Leverage: {config_summary.get('leverage', 1)}x\n"
-            f"Risk/Trade: {config_summary.get('risk_pct', 2)}%"
+        if not self._enabled:
+            return
+
+        message = _STARTUP(
+            mode=config_summary.get('mode', 'UNKNOWN'),
+            symbols=', '.join(config_summary.get('symbols', [])),
+            leverage=config_summary.get('leverage', 1),
+            risk_pct=config_summary.get('risk_pct', 2)
         )
         await self.send_message(message)
 
     async def send_config(self, config: dict, env_type: str):
         """Send full configuration to Telegram on startup."""
+        if not self._enabled:
+            return
+
         risk = config.get("risk", {})
         strategies = config.get("strategies", {})
         regime = config.get("regime", {})
@@ -218,11 +346,10 @@ class TelegramAlerter:
 
     async def alert_shutdown(self, reason: str, positions_closed: int = 0):
         """Alert when bot shuts down."""
-        message = (
-            f"🛑 <b>Trading Bot Stopped</b>\n"
-            f"Reason: {reason}\n"
-            f"Positions Closed: {positions_closed}"
-        )
+        if not self._enabled:
+            return
+
+        message = _SHUTDOWN(reason=reason, positions_closed=positions_closed)
         await self.send_message(message)
 
 
@@ -1,14 +1,26 @@
-from fastapi import FastAPI, Depends, HTTPException, status
+from fastapi import FastAPI, Depends, HTTPException, Request, Response, status
 from fastapi.security import APIKeyHeader
 from fastapi.responses import HTMLResponse, FileResponse
 from fastapi.staticfiles import StaticFiles
 from bot.state.db import db
 from bot.exchange.binance_client import binance_client
-from bot.core.config import load_config
+from bot.core.config import load_config, load_env
+from bot.alerts.telegram import telegram_alerter
 import os
+import asyncio
+import hmac
+import hashlib
+import time
 from pathlib import Path
+from typing import Optional
 
-app = FastAPI(title="Crypto Bot Dashboard")
+try:
+    import orjson  # noqa: F401  (ORJSONResponse needs it at render time)
+    from fastapi.responses import ORJSONResponse as DefaultResponse
+except ImportError:
+    from fastapi.responses import JSONResponse as DefaultResponse
+
+app = FastAPI(title="Crypto Bot Dashboard", default_response_class=DefaultResponse)
 
 # Get the project root directory
 PROJECT_ROOT = Path(__file__).parent.parent.parent
@@ -23,13 +35,46 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Explicit column lists keep the SQL text constant (hits sqlite3's statement cache)
+# and stop new table columns from leaking into the API payloads
+TRADES_COLS = (
+    "id", "symbol", "strategy", "side", "entry_price", "exit_price", "size", "pnl", "fee",
+    "entry_time", "exit_time", "exit_reason", "regime_at_entry", "sl_price", "tp_price",
+)
+TRADES_SQL = f"SELECT {', '.join(TRADES_COLS)} FROM trades ORDER BY entry_time DESC, id DESC LIMIT ?"
+# Keyset page: rows strictly after the (entry_time, id) cursor, walked via idx_trades_entry_time
+TRADES_PAGE_SQL = (
+    f"SELECT {', '.join(TRADES_COLS)} FROM trades WHERE (entry_time, id) < (?, ?) "
+    "ORDER BY entry_time DESC, id DESC LIMIT ?"
+)
+
+MAX_TRADES_LIMIT = 500
+
+REGIMES_COLS = ("symbol", "regime", "confidence", "created_at")
+# Latest regime per symbol; both lookups are served by idx_regimes_symbol_created
+REGIMES_SQL = f"""
+    SELECT {', '.join('r.' + c for c in REGIMES_COLS)}
+    FROM (SELECT DISTINCT symbol FROM regimes) s
+    JOIN regimes r ON r.id = (
+        SELECT id FROM regimes WHERE symbol = s.symbol ORDER BY created_at DESC LIMIT 1
+    )
+"""
+REGIMES_CACHE_TTL = 5.0  # seconds; regimes only change once per trading cycle
+_regimes_cache = {"expires": 0.0, "data": None}
+
+# dashboard.html bytes + ETag, reloaded only when the file's mtime changes
+_dashboard_cache = {"mtime": None, "body": None, "etag": None}
+
 API_KEY_NAME = "X-API-Token"
 api_key_header = APIKeyHeader(name=API_KEY_NAME, auto_error=False)
 
+# Resolved once at import; compared in constant time on every request
+load_env()
+EXPECTED_TOKEN = os.getenv("DASHBOARD_TOKEN", "secret").strip().encode()
+
 async def get_api_key(api_key_header: str = Depends(api_key_header)):
     # Simple token check
-    expected = os.getenv("DASHBOARD_TOKEN", "secret").strip()
-    if api_key_header != expected:
+    if not api_key_header or not hmac.compare_digest(api_key_header.encode(), EXPECTED_TOKEN):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid API Token",
@@ -46,22 +91,37 @@ async def startup():
     if not binance_client.client:
         await binance_client.initialize()
 
+@app.on_event("shutdown")
+async def shutdown():
+    await telegram_alerter.aclose()
+
 @app.get("/health")
 def health():
     return {"status": "ok"}
 
 
 @app.get("/", response_class=HTMLResponse)
-async def serve_dashboard():
+async def serve_dashboard(request: Request):
     """Serve the dashboard HTML page."""
     dashboard_path = PROJECT_ROOT / "dashboard.html"
-    if dashboard_path.exists():
-        return HTMLResponse(content=dashboard_path.read_text(), status_code=200)
-    return HTMLResponse(content="<h1>Dashboard not found</h1>", status_code=404)
+    try:
+        mtime = dashboard_path.stat().st_mtime_ns
+    except FileNotFoundError:
+        return HTMLResponse(content="<h1>Dashboard not found</h1>", status_code=404)
+
+    if _dashboard_cache["mtime"] != mtime:
+        # File I/O is blocking; keep it off the event loop
+        body = await asyncio.to_thread(dashboard_path.read_bytes)
+        _dashboard_cache.update(mtime=mtime, body=body, etag=f'"{hashlib.md5(body).hexdigest()}"')
+
+    headers = {"ETag": _dashboard_cache["etag"]}
+    if request.headers.get("if-none-match") == _dashboard_cache["etag"]:
+        return Response(status_code=304, headers=headers)
+    return HTMLResponse(content=_dashboard_cache["body"], status_code=200, headers=headers)
 
 @app.get("/api/positions", dependencies=[Depends(get_api_key)])
 async def get_positions():
-    """Fetch live positions from Binance."""
+    """Fetch live positions from Binance (served from the client's TTL cache)."""
     try:
         positions = await binance_client.fetch_positions()
         return {"positions": [
@@ -77,17 +137,37 @@ async def get_positions():
             for p in positions
         ]}
     except Exception as e:
-        return {"positions": [], "error": str(e)}
+        # Exchange unavailable or rate limited: fall back to the engine's last snapshot
+        snapshot = await db.get_positions_snapshot()
+        for p in snapshot:
+            p["leverage"] = None
+        return {"positions": snapshot, "error": str(e), "stale": True}
+
+def next_cursor(trades: list, limit: int) -> Optional[dict]:
+    """Cursor for the page after trades, or None when this was the last page."""
+    if len(trades) < limit:
+        return None
+    last = trades[-1]
+    return {"before": last["entry_time"], "before_id": last["id"]}
 
 @app.get("/api/trades", dependencies=[Depends(get_api_key)])
-async def get_trades(limit: int = 50):
-    trades = await db.fetch_all("SELECT * FROM trades ORDER BY entry_time DESC LIMIT ?", (limit,))
-    return {"trades": [dict(t) for t in trades]}
+async def get_trades(limit: int = 50, before: Optional[str] = None, before_id: Optional[int] = None):
+    limit = max(1, min(limit, MAX_TRADES_LIMIT))
+    if before is None:
+        trades = await db.fetch_all(TRADES_SQL, (limit,))
+    else:
+        trades = await db.fetch_all(TRADES_PAGE_SQL, (before, before_id if before_id is not None else 2**63 - 1, limit))
+    trades = [{k: t[k] for k in TRADES_COLS} for t in trades]
+    return {"trades": trades, "next_cursor": next_cursor(trades, limit)}
 
 @app.get("/api/regimes", dependencies=[Depends(get_api_key)])
 async def get_regimes():
-    regimes = await db.fetch_all("SELECT symbol, regime, confidence, created_at FROM regimes GROUP BY symbol HAVING max(created_at)")
-    return {"regimes": [dict(r) for r in regimes]}
+    now = time.monotonic()
+    if _regimes_cache["data"] is None or now >= _regimes_cache["expires"]:
+        regimes = await db.fetch_all(REGIMES_SQL)
+        _regimes_cache["data"] = [{k: r[k] for k in REGIMES_COLS} for r in regimes]
+        _regimes_cache["expires"] = now + REGIMES_CACHE_TTL
+    return {"regimes": _regimes_cache["data"]}
 
 
 @app.get("/api/stats", dependencies=[Depends(get_api_key)])
@@ -102,7 +182,8 @@ async def get_performance_stats():
 
 
 @app.get("/api/trade-history", dependencies=[Depends(get_api_key)])
-async def get_trade_history(limit: int = 50):
+async def get_trade_history(limit: int = 50, before: Optional[str] = None, before_id: Optional[int] = None):
     """Get detailed trade history with all fields."""
-    trades = await db.get_trade_history(limit)
-    return {"trades": trades}
+    limit = max(1, min(limit, MAX_TRADES_LIMIT))
+    trades = await db.get_trade_history(limit, before, before_id)
+    return {"trades": trades, "next_cursor": next_cursor(trades, limit)}
@@ -1,12 +1,80 @@
 import yaml
 import os
+import json
+import logging
+from dotenv import load_dotenv
+
+logger = logging.getLogger(__name__)
+
+try:
+    from yaml import CSafeLoader as _Loader
+    _HAS_LIBYAML = True
+except ImportError:
+    from yaml import SafeLoader as _Loader
+    _HAS_LIBYAML = False
+
+_warned_no_libyaml = False
+
+_env_loaded = False
+
+
+def load_env() -> None:
+    """Loads .env into os.environ, once per process."""
+    global _env_loaded
+    if not _env_loaded:
+        load_dotenv()
+        _env_loaded = True
+
+# abspath -> (mtime_ns, parsed config); callers treat the result as read-only
+_config_cache = {}
+
+
+def _load_json_sidecar(cache_path: str, yaml_mtime_ns: int):
+    """Returns the compiled JSON copy of the config if it is at least as new as the YAML."""
+    try:
+        if os.stat(cache_path).st_mtime_ns < yaml_mtime_ns:
+            return None
+        with open(cache_path, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_json_sidecar(cache_path: str, config) -> None:
+    """Stores the parsed config as JSON when it round-trips losslessly."""
+    try:
+        encoded = json.dumps(config)
+        if json.loads(encoded) != config:
+            return
+        with open(cache_path, "w") as f:
+            f.write(encoded)
+    except (OSError, TypeError, ValueError):
+        pass
+
 
 def load_config(path: str = "config.yaml") -> dict:
+    global _warned_no_libyaml
     if not os.path.exists(path):
         raise FileNotFoundError(f"Config file not found: {path}")
-    
-    with open(path, "r") as f:
-        try:
-            return yaml.safe_load(f)
-        except yaml.YAMLError as exc:
-            raise ValueError(f"Error parsing config file: {exc}")
+
+    abspath = os.path.abspath(path)
+    mtime_ns = os.stat(abspath).st_mtime_ns
+    cached = _config_cache.get(abspath)
+    if cached is not None and cached[0] == mtime_ns:
+        return cached[1]
+
+    cache_path = abspath + ".cache.json"
+    config = _load_json_sidecar(cache_path, mtime_ns)
+    if config is None:
+        if not _HAS_LIBYAML and not _warned_no_libyaml:
+            logger.warning("libyaml not available, falling back to the pure-Python YAML loader")
+            _warned_no_libyaml = True
+        with open(path, "r") as f:
+            try:
+                config = yaml.load(f, Loader=_Loader)
+            except yaml.YAMLError as exc:
+                raise ValueError(f"Error parsing config file: {exc}")
+        _write_json_sidecar(cache_path, config)
+
+    _config_cache[abspath] = (mtime_ns, config)
+    return config
@@ -1,5 +1,6 @@
 import asyncio
 import logging
+from functools import lru_cache
 from bot.core.config import load_config
 from bot.exchange.binance_client import binance_client
 from bot.exchange.websocket_client import ws_client
@@ -12,6 +13,12 @@ from bot.state.db import db
 
 logger = logging.getLogger(__name__)
 
+# Max symbols processed concurrently per cycle
+SYMBOL_CONCURRENCY = 8
+
+# Max concurrent kline requests during WebSocket preload (500-candle klines weigh 5)
+PRELOAD_CONCURRENCY = 5
+
 class TradingEngine:
     def __init__(self):
         global regime_classifier
@@ -20,6 +27,8 @@ class TradingEngine:
         self.symbols = self.config.get("symbols", [])
         self.router = StrategyRouter(self.config)
         self._ws_initialized = False
+        # Orders stay one-at-a-time even though symbols are analyzed concurrently
+        self._execution_lock = asyncio.Lock()
 
         # Initialize regime classifier with config
         regime_classifier = create_regime_classifier(self.config)
@@ -64,29 +73,31 @@ class TradingEngine:
         # Initialize WebSocket for all symbols
         await ws_client.initialize(self.symbols, timeframes=["1h"])
 
-        # Preload historical data via REST API (one-time)
-        for symbol in self.symbols:
+        # Preload historical data via REST API (one-time), bounded to stay within rate limits
+        sem = asyncio.Semaphore(PRELOAD_CONCURRENCY)
+
+        async def preload(symbol):
             try:
-                df = await market_data.get_candles(symbol, "1h", limit=500)
+                async with sem:
+                    df = await market_data.get_candles(symbol, "1h", limit=500)
                 if not df.empty:
-                    candles = df.to_dict('records')
-                    await ws_client.preload_candles(symbol, "1h", candles)
-                    logger.info(f"Preloaded {len(candles)} candles for {symbol}")
-                # Small delay between REST calls during preload
-                await asyncio.sleep(0.3)
+                    await ws_client.preload_candles(symbol, "1h", df)
+                    logger.info(f"Preloaded {len(df)} candles for {symbol}")
             except Exception as e:
                 logger.error(f"Failed to preload {symbol}: {e}")
 
+        await asyncio.gather(*(preload(symbol) for symbol in self.symbols))
+
         self._ws_initialized = True
         logger.info("WebSocket initialization complete")
 
     async def start(self):
         logger.info("Starting Trading Engine Loop...")
-        await db.connect()
         await binance_client.initialize()
 
-        # Initialize WebSocket and preload historical data
-        await self._initialize_websocket()
+        # Initialize WebSocket and preload historical data, while margin mode and leverage
+        # are set for every symbol so the first trade doesn't pay for them
+        await asyncio.gather(self._initialize_websocket(), executor.warmup(self.symbols))
 
         # Start WebSocket in background task
         ws_task = asyncio.create_task(ws_client.start())
@@ -154,11 +165,37 @@ class TradingEngine:
             logger.error(f"Failed to fetch positions: {e}")
             return
 
+        # Snapshot for readers that shouldn't hit the exchange (dashboard fallback)
+        await db.save_positions_snapshot(current_positions)
+
         # 4. Process all symbols using WebSocket cached data (NO REST calls)
-        for symbol in self.symbols:
-            await self.process_symbol(symbol, equity, current_positions)
+        # Regime rows are written in one batch at the end of the cycle
+        regime_rows = []
+        sem = asyncio.Semaphore(SYMBOL_CONCURRENCY)
+
+        async def guarded(symbol):
+            async with sem:
+                await self.process_symbol(symbol, equity, current_positions, regime_rows)
 
-    async def process_symbol(self, symbol: str, equity: float, current_positions: list):
+        try:
+            results = await asyncio.gather(*(guarded(s) for s in self.symbols), return_exceptions=True)
+        finally:
+            if regime_rows:
+                await db.executemany(
+                    "INSERT INTO regimes (symbol, regime, confidence, features_json) VALUES (?, ?, ?, ?)",
+                    regime_rows
+                )
+
+        errors = []
+        for symbol, result in zip(self.symbols, results):
+            if isinstance(result, Exception):
+                logger.error(f"[{symbol}] Processing failed: {result}")
+                errors.append(result)
+        if errors:
+            # Surface to the run loop so rate-limit backoff still applies
+            raise errors[0]
+
+    async def process_symbol(self, symbol: str, equity: float, current_positions: list, regime_rows: list):
         # A. Get candle data from WebSocket cache (NO REST API call)
         df = await ws_client.get_candles(symbol, "1h")
         if df.empty or len(df) < 50:
@@ -166,15 +203,14 @@ class TradingEngine:
             logger.warning(f"[{symbol}] Insufficient candle data ({candle_count}/50 needed)")
             return
 
-        # B. Calculate Indicators
-        df = indicators.add_all(df)
+        # B. Calculate Indicators (closed bars are cached between cycles)
+        df = indicators.update(symbol, df)
 
         # C. Detect Regime
         regime_info = self.regime_classifier.detect_regime(df, symbol)
 
-        # Save Regime to DB
-        await db.execute(
-            "INSERT INTO regimes (symbol, regime, confidence, features_json) VALUES (?, ?, ?, ?)",
+        # Queue Regime for the cycle's batched DB write
+        regime_rows.append(
             (symbol, regime_info['regime'], regime_info['confidence'], str(regime_info['features']))
         )
 
@@ -186,7 +222,10 @@ class TradingEngine:
 
         # E. Execution (positions already fetched once per cycle)
         if signal["side"] != "NONE":
-            await executor.execute_signal(signal, equity, current_positions)
+            async with self._execution_lock:
+                await executor.execute_signal(signal, equity, current_positions)
 
-# Global Engine
-trading_engine = TradingEngine()
+# Global Engine, built on first use so importing this module stays cheap
+@lru_cache(maxsize=1)
+def get_engine() -> TradingEngine:
+    return TradingEngine()
@@ -2,9 +2,27 @@ import logging
 import logging.handlers
 import sys
 import os
+import time
 from datetime import datetime
 from pathlib import Path
 
+DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# (epoch second, formatted string) of the last timestamp built; every handler
+# formats each record, so records within the same second share one strftime
+_timestamp_cache = (None, '')
+
+
+def _format_timestamp(created: float) -> str:
+    """Formats a record's creation time, reusing the string within the same second."""
+    global _timestamp_cache
+    second = int(created)
+    cached_second, cached = _timestamp_cache
+    if second != cached_second:
+        cached = time.strftime(DATE_FORMAT, time.localtime(second))
+        _timestamp_cache = (second, cached)
+    return cached
+
 
 class ColoredFormatter(logging.Formatter):
     """Custom formatter with colors for terminal output."""
@@ -18,14 +36,18 @@ class ColoredFormatter(logging.Formatter):
     }
     RESET = '\033[0m'
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Colored, padded level names built once instead of per record
+        self._prefix = {level: f"{color}{level:8}{self.RESET}" for level, color in self.COLORS.items()}
+
     def format(self, record: logging.LogRecord) -> str:
-        # Add color based on level
-        color = self.COLORS.get(record.levelname, '')
-        reset = self.RESET
+        level = self._prefix.get(record.levelname)
+        if level is None:
+            level = f"{record.levelname:8}{self.RESET}"
 
         # Format: timestamp - level - logger - message
-        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        formatted = f"{timestamp} - {color}{record.levelname:8}{reset} - {record.name} - {record.getMessage()}"
+        formatted = f"{_format_timestamp(record.created)} - {level} - {record.name} - {record.getMessage()}"
 
         # Add exception info if present
         if record.exc_info:
@@ -38,8 +60,7 @@ class SimpleFormatter(logging.Formatter):
     """Simple human-readable formatter without colors (for file logging)."""
 
     def format(self, record: logging.LogRecord) -> str:
-        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        formatted = f"{timestamp} - {record.levelname:8} - {record.name} - {record.getMessage()}"
+        formatted = f"{_format_timestamp(record.created)} - {record.levelname:8} - {record.name} - {record.getMessage()}"
 
         if record.exc_info:
             formatted += f"\n{self.formatException(record.exc_info)}"
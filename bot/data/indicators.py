@@ -1,19 +1,150 @@
+import numpy as np
 import pandas as pd
-import pandas_ta as ta
 import logging
+from dataclasses import dataclass
+from typing import Dict
+
+try:
+    from numba import njit
+except ImportError:
+    def njit(*args, **kwargs):
+        """Fallback when numba is missing: run the kernels as plain Python."""
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda func: func
 
 logger = logging.getLogger(__name__)
 
+ADX_LENGTH = 14
+EMA_FAST = 20
+EMA_SLOW = 50
+RSI_LENGTH = 14
+BB_LENGTH = 20
+BB_STD = 2.0
+ATR_LENGTH = 14
+
+
+# Kernels follow pandas_ta's definitions: EMA is SMA-seeded with alpha=2/(n+1),
+# RSI/ATR/ADX smooth with Wilder's RMA (ewm alpha=1/n, adjust=True, min_periods=n)
+# and Bollinger Bands use the population standard deviation.
+#
+# Everything except the bands is recursive, so the kernel walks bars one at a
+# time and keeps its running values in a flat state vector. Processing a whole
+# window from a fresh state is the batch path; continuing from a saved state
+# only pays for the bars that are new.
+
+# Output columns of _advance, in order
+OUTPUT_COLS = ('ADX_14', 'EMA_20', 'EMA_50', 'RSI_14', 'BBU_20_2.0', 'BBM_20_2.0', 'BBL_20_2.0', 'ATR_14')
+_OUT_ADX, _OUT_EMA_FAST, _OUT_EMA_SLOW, _OUT_RSI, _OUT_BBU, _OUT_BBM, _OUT_BBL, _OUT_ATR = range(8)
+
+# State vector layout: bar count, previous bar, EMA running values/seed sums,
+# then one (num, den, count) block per RMA series
+_S_BARS, _S_PREV_HIGH, _S_PREV_LOW, _S_PREV_CLOSE = 0, 1, 2, 3
+_S_EMA_FAST, _S_EMA_SLOW, _S_SUM_FAST, _S_SUM_SLOW = 4, 5, 6, 7
+_S_ATR, _S_ADX_TR, _S_GAIN, _S_LOSS, _S_PLUS_DM, _S_MINUS_DM, _S_DX = 8, 11, 14, 17, 20, 23, 26
+STATE_SIZE = 29
+
+
+def new_state() -> np.ndarray:
+    """Returns a kernel state vector for a series with no bars yet."""
+    return np.zeros(STATE_SIZE)
+
+
+@njit(cache=True, error_model='numpy')
+def _rma_step(state, slot, x, n):
+    """Folds one value into the RMA block at slot and returns the smoothed value."""
+    decay = 1.0 - 1.0 / n
+    state[slot] *= decay
+    state[slot + 1] *= decay
+    if not np.isnan(x):
+        state[slot] += x
+        state[slot + 1] += 1.0
+        state[slot + 2] += 1.0
+    if state[slot + 2] >= n:
+        return state[slot] / state[slot + 1]
+    return np.nan
+
+
+@njit(cache=True, error_model='numpy')
+def _ema_step(state, slot, sum_slot, bars, x, n):
+    """Advances the SMA-seeded EMA at slot by one value."""
+    if bars < n:
+        state[sum_slot] += x
+        if bars == n - 1:
+            state[slot] = state[sum_slot] / n
+            return state[slot]
+        return np.nan
+    alpha = 2.0 / (n + 1)
+    state[slot] = alpha * x + (1.0 - alpha) * state[slot]
+    return state[slot]
+
+
+@njit(cache=True, error_model='numpy')
+def _advance(state, high, low, close, out, start, stop):
+    """Processes bars start..stop-1, writing their indicators to out[i - start]."""
+    for i in range(start, stop):
+        row = i - start
+        bars = int(state[_S_BARS])
+        h = high[i]
+        l = low[i]
+        c = close[i]
+
+        if bars == 0:
+            tr = gain = loss = plus_dm = minus_dm = np.nan
+        else:
+            prev_close = state[_S_PREV_CLOSE]
+            tr = max(h - l, abs(h - prev_close), abs(prev_close - l))
+            diff = c - prev_close
+            gain = diff if diff > 0 else 0.0
+            loss = -diff if diff < 0 else 0.0
+            up = h - state[_S_PREV_HIGH]
+            down = state[_S_PREV_LOW] - l
+            plus_dm = up if (up > down and up > 0) else 0.0
+            minus_dm = down if (down > up and down > 0) else 0.0
 
-def find_column(df: pd.DataFrame, prefix: str) -> str:
-    """Find a column that starts with the given prefix."""
-    for col in df.columns:
-        if col.startswith(prefix):
-            return col
-    return None
+        out[row, _OUT_ATR] = _rma_step(state, _S_ATR, tr, ATR_LENGTH)
+
+        avg_gain = _rma_step(state, _S_GAIN, gain, RSI_LENGTH)
+        avg_loss = _rma_step(state, _S_LOSS, loss, RSI_LENGTH)
+        out[row, _OUT_RSI] = 100.0 * avg_gain / (avg_gain + avg_loss)
+
+        k = 100.0 / _rma_step(state, _S_ADX_TR, tr, ADX_LENGTH)
+        dmp = k * _rma_step(state, _S_PLUS_DM, plus_dm, ADX_LENGTH)
+        dmn = k * _rma_step(state, _S_MINUS_DM, minus_dm, ADX_LENGTH)
+        dx = 100.0 * abs(dmp - dmn) / (dmp + dmn)
+        out[row, _OUT_ADX] = _rma_step(state, _S_DX, dx, ADX_LENGTH)
+
+        out[row, _OUT_EMA_FAST] = _ema_step(state, _S_EMA_FAST, _S_SUM_FAST, bars, c, EMA_FAST)
+        out[row, _OUT_EMA_SLOW] = _ema_step(state, _S_EMA_SLOW, _S_SUM_SLOW, bars, c, EMA_SLOW)
+
+        if i >= BB_LENGTH - 1:
+            window = close[i - BB_LENGTH + 1:i + 1]
+            mean = window.mean()
+            std = np.sqrt(((window - mean) ** 2).mean())
+            out[row, _OUT_BBU] = mean + BB_STD * std
+            out[row, _OUT_BBM] = mean
+            out[row, _OUT_BBL] = mean - BB_STD * std
+        else:
+            out[row, _OUT_BBU] = out[row, _OUT_BBM] = out[row, _OUT_BBL] = np.nan
+
+        state[_S_PREV_HIGH] = h
+        state[_S_PREV_LOW] = l
+        state[_S_PREV_CLOSE] = c
+        state[_S_BARS] = bars + 1
+
+
+@dataclass
+class IndicatorState:
+    """Kernel state and indicator values for the closed bars of one series."""
+    state: np.ndarray
+    timestamps: np.ndarray
+    values: np.ndarray
 
 
 class Indicators:
+    def __init__(self):
+        self._states: Dict[str, IndicatorState] = {}
+
     @staticmethod
     def add_all(df: pd.DataFrame) -> pd.DataFrame:
         """
@@ -23,60 +154,108 @@ class Indicators:
             return df
 
         try:
-            # Trend Indicators
-            df.ta.adx(append=True, length=14)
-            df.ta.ema(close='close', length=20, append=True)
-            df.ta.ema(close='close', length=50, append=True)
-
-            # Momentum
-            df.ta.rsi(close='close', length=14, append=True)
-
-            # Volatility
-            df.ta.bbands(close='close', length=20, std=2, append=True)
-            df.ta.atr(length=14, append=True)
-
-            # Find Bollinger Band columns (naming varies by pandas_ta version)
-            bbu_col = find_column(df, 'BBU_')
-            bbl_col = find_column(df, 'BBL_')
-            bbm_col = find_column(df, 'BBM_')
-
-            if bbu_col and bbl_col and bbm_col:
-                df['BB_WIDTH'] = (df[bbu_col] - df[bbl_col]) / df[bbm_col]
-                # Standardize column names for strategies
-                df['BBU_20_2.0'] = df[bbu_col]
-                df['BBL_20_2.0'] = df[bbl_col]
-                df['BBM_20_2.0'] = df[bbm_col]
-            else:
-                logger.warning(f"BB columns not found. Available: {[c for c in df.columns if 'BB' in c]}")
-                df['BB_WIDTH'] = 0.0
-
-            # Find EMA columns and standardize names
-            ema20_col = find_column(df, 'EMA_20')
-            ema50_col = find_column(df, 'EMA_50')
-
-            if ema20_col and ema50_col:
-                df['EMA_SEP'] = (df[ema20_col] - df[ema50_col]) / df[ema50_col] * 100
-                # Standardize column names for strategies
-                df['EMA_20'] = df[ema20_col]
-                df['EMA_50'] = df[ema50_col]
-            else:
-                logger.warning(f"EMA columns not found. Available: {[c for c in df.columns if 'EMA' in c]}")
-                df['EMA_SEP'] = 0.0
-
-            # Find RSI column and standardize
-            rsi_col = find_column(df, 'RSI_')
-            if rsi_col:
-                df['RSI_14'] = df[rsi_col]
-
-            # Rename ATR column for consistency (ATRr_14 -> ATR_14)
-            atr_col = find_column(df, 'ATRr_')
-            if atr_col:
-                df['ATR_14'] = df[atr_col]
-
+            high, low, close = Indicators._ohlc_arrays(df)
+            values = np.empty((len(df), len(OUTPUT_COLS)))
+            _advance(new_state(), high, low, close, values, 0, len(df))
+            Indicators._assign(df, values)
         except Exception as e:
             logger.error(f"Error calculating indicators: {e}")
 
         return df
 
+    def update(self, key: str, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Same as add_all, but reuses the values computed for closed bars on earlier calls.
+
+        The last row is treated as the still-forming candle and is recomputed every
+        time; only bars that closed since the previous call go through the kernel.
+        """
+        if df.empty:
+            return df
+
+        try:
+            high, low, close = self._ohlc_arrays(df)
+            timestamps = df['timestamp'].to_numpy()
+            closed = len(df) - 1
+
+            cached = self._states.get(key)
+            resume_at = self._resume_position(cached, timestamps, closed)
+            if resume_at is None:
+                # Cold start (or history no longer lines up): run the full window
+                cached = IndicatorState(new_state(), timestamps[:closed], np.empty((closed, len(OUTPUT_COLS))))
+                _advance(cached.state, high, low, close, cached.values, 0, closed)
+            elif resume_at < closed:
+                fresh = np.empty((closed - resume_at, len(OUTPUT_COLS)))
+                _advance(cached.state, high, low, close, fresh, resume_at, closed)
+                cached.values = np.concatenate((cached.values, fresh))[-closed:]
+                cached.timestamps = timestamps[:closed]
+            self._states[key] = cached
+
+            # Forming candle: advance a scratch copy so the saved state stays at the last close
+            forming = np.empty((1, len(OUTPUT_COLS)))
+            _advance(cached.state.copy(), high, low, close, forming, closed, closed + 1)
+
+            self._assign(df, np.concatenate((cached.values[-closed:], forming)))
+        except Exception as e:
+            logger.error(f"Error calculating indicators for {key}: {e}")
+
+        return df
+
+    @staticmethod
+    def _resume_position(cached, timestamps: np.ndarray, closed: int):
+        """Index of the first bar not yet folded into cached, or None if it can't be reused."""
+        if cached is None or closed == 0 or len(cached.timestamps) == 0:
+            return None
+        last_seen = cached.timestamps[-1]
+        pos = int(np.searchsorted(timestamps[:closed], last_seen))
+        if pos >= closed or timestamps[pos] != last_seen or len(cached.values) < pos + 1:
+            return None
+        return pos + 1
+
+    @staticmethod
+    def _ohlc_arrays(df: pd.DataFrame):
+        return (
+            df['high'].to_numpy(dtype=np.float64),
+            df['low'].to_numpy(dtype=np.float64),
+            df['close'].to_numpy(dtype=np.float64),
+        )
+
+    @staticmethod
+    def _assign(df: pd.DataFrame, values: np.ndarray):
+        """Writes kernel output plus the derived columns onto df."""
+        for j, col in enumerate(OUTPUT_COLS):
+            df[col] = values[:, j]
+
+        ema20 = values[:, _OUT_EMA_FAST]
+        ema50 = values[:, _OUT_EMA_SLOW]
+        df['EMA_SEP'] = (ema20 - ema50) / ema50 * 100
+        df['BB_WIDTH'] = (values[:, _OUT_BBU] - values[:, _OUT_BBL]) / values[:, _OUT_BBM]
+
+        Indicators.add_trend_conditions(df)
+
+    @staticmethod
+    def add_trend_conditions(df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Adds boolean EMA20 pullback/bounce conditions for every bar in one vectorized pass.
+        Each row describes the setup as seen from that bar (previous bars via shift).
+        """
+        ema20 = df['EMA_20']
+        close = df['close']
+        rsi = df['RSI_14'] if 'RSI_14' in df.columns else 50.0
+
+        # Bull: dip below EMA20 on the previous bar, close back above it now
+        df['PULLBACK_BULL'] = df['low'].shift(1) < ema20
+        df['BOUNCE_BULL'] = (close > ema20) & (df['low'] < ema20 * 1.002)
+        df['RSI_OK_BULL'] = rsi < 70
+        df['TRENDED_ABOVE'] = (close > ema20).shift(2, fill_value=False)
+
+        # Bear: rally above EMA20 on the previous bar, close back below it now
+        df['PULLBACK_BEAR'] = df['high'].shift(1) > ema20
+        df['BOUNCE_BEAR'] = (close < ema20) & (df['high'] > ema20 * 0.998)
+        df['RSI_OK_BEAR'] = rsi > 30
+        df['TRENDED_BELOW'] = (close < ema20).shift(2, fill_value=False)
+
+        return df
+
 
 indicators = Indicators()
@@ -1,29 +1,53 @@
+import numpy as np
 import pandas as pd
 import logging
 from bot.exchange.binance_client import binance_client
+from bot.exchange.websocket_client import ws_client
 
 logger = logging.getLogger(__name__)
 
 class MarketData:
-    def __init__(self, client=binance_client):
+    def __init__(self, client=binance_client, stream=ws_client):
         self.client = client
+        self.stream = stream
 
     async def get_candles(self, symbol: str, timeframe: str, limit: int = 500) -> pd.DataFrame:
         """
         Fetches OHLCV data and returns a DataFrame.
         Columns: timestamp, open, high, low, close, volume
+
+        Served from the kline stream's buffer when the socket is connected, the buffer
+        was updated within the last candle interval, has no bars missing from a
+        disconnect and holds enough candles for the pair; REST otherwise. A REST fetch
+        after a disconnect also refills the buffer when it covers what the buffer holds.
         """
+        if self.stream is not None and self.stream.is_live(symbol, timeframe):
+            if await self.stream.get_candle_count(symbol, timeframe) >= limit:
+                df = await self.stream.get_candles(symbol, timeframe)
+                return df.iloc[-limit:].reset_index(drop=True)
+
         raw_data = await self.client.fetch_ohlcv(symbol, timeframe, limit)
         
-        if not raw_data:
+        if len(raw_data) == 0:
             logger.warning(f"No data returned for {symbol} {timeframe}")
             return pd.DataFrame()
 
-        df = pd.DataFrame(raw_data, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
-        
-        # Convert timestamp to datetime
-        df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
-        
+        # Column-major float64 block from fetch_ohlcv; each column below is a contiguous view
+        arr = np.asarray(raw_data, dtype=np.float64)
+
+        df = pd.DataFrame({
+            'timestamp': pd.to_datetime(arr[:, 0].astype(np.int64), unit='ms'),
+            'open': arr[:, 1],
+            'high': arr[:, 2],
+            'low': arr[:, 3],
+            'close': arr[:, 4],
+            'volume': arr[:, 5],
+        }, copy=False)
+
+        if self.stream is not None and self.stream.needs_backfill(symbol, timeframe):
+            if len(df) >= await self.stream.get_candle_count(symbol, timeframe):
+                await self.stream.preload_candles(symbol, timeframe, df)
+
         return df
 
 market_data = MarketData()
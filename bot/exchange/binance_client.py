@@ -1,32 +1,150 @@
 import os
+import json
 import time
 import hmac
 import hashlib
 import logging
 import asyncio
-from urllib.parse import urlencode
+import re
+from urllib.parse import quote_plus
 from typing import Optional, Dict, Any
-from datetime import datetime, timedelta
+from functools import lru_cache
+from decimal import Decimal
+import numpy as np
 import httpx
-from dotenv import load_dotenv
+import websockets
+from bot.core.config import load_env
+
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
 
 logger = logging.getLogger(__name__)
 
 # Binance Futures API endpoints
 TESTNET_BASE_URL = "https://testnet.binancefuture.com"
 MAINNET_BASE_URL = "https://fapi.binance.com"
+TESTNET_USER_STREAM_URL = "wss://stream.binancefuture.com/ws"
+MAINNET_USER_STREAM_URL = "wss://fstream.binance.com/ws"
 
 # Rate limiting constants
 MAX_REQUESTS_PER_MINUTE = 1200  # Conservative limit (Binance allows 2400 for most endpoints)
 RATE_LIMIT_WINDOW = 60  # seconds
+WEIGHT_LIMIT_PER_MINUTE = 2400  # Request weight Binance counts per IP per wall-clock minute
+WEIGHT_PACING_THRESHOLD = 0.8   # Hold new requests until the next minute past this share
+# Order endpoints are also counted separately: 300 orders per 10 seconds per account
+ORDER_LIMIT_PER_WINDOW = 300
+ORDER_RATE_WINDOW = 10  # seconds
+
+# In-place retries: 429 for any method, 5xx only for GET (an order may have gone through)
+MAX_RETRIES = 2
+MAX_RETRY_DELAY = 10  # seconds; longer Retry-After values fall through to the backoff path
+RETRYABLE_SERVER_ERRORS = frozenset((500, 502, 503, 504))
+
+FORM_HEADERS = {"Content-Type": "application/x-www-form-urlencoded"}
+
+# Back-to-back uncached balance/positions reads within this window share one account call
+ACCOUNT_COALESCE_SECONDS = 0.25
+
+# Local clock is re-synced against /fapi/v1/time this often
+TIME_SYNC_INTERVAL_SECONDS = 30 * 60
+
+# User-data stream: listenKeys expire after 60 minutes without a keepalive
+LISTEN_KEY_KEEPALIVE_SECONDS = 30 * 60
+USER_STREAM_RECONNECT_DELAY = 5  # seconds
+# Mark price and unrealized PnL are not pushed on the user stream, so even while it
+# is live the account payload is refetched at least this often
+ACCOUNT_STREAM_MAX_AGE = 60  # seconds
+# positionAmt strings Binance sends for flat positions (formatted to the symbol's precision)
+ZERO_AMOUNTS = frozenset(['0'] + ['0.' + '0' * n for n in range(1, 9)])
+CLOSED_ORDER_STATUSES = frozenset(('FILLED', 'CANCELED', 'EXPIRED', 'EXPIRED_IN_MATCH', 'REJECTED'))
+# Ids of recently closed orders kept so a late REST reply can't re-add one the stream closed
+CLOSED_ORDER_MEMORY = 1000
+
+# Parsed trading rules persisted across restarts, revalidated with a conditional GET
+EXCHANGE_INFO_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "binance")
+EXCHANGE_INFO_REFRESH_SECONDS = 24 * 3600
+EXCHANGE_INFO_CACHE_VERSION = 1  # bump when the parsed rule fields change
+
+# Used for symbols missing from exchangeInfo (or when it could not be loaded)
+DEFAULT_SYMBOL_INFO = {
+    'quantityPrecision': 3,
+    'pricePrecision': 2,
+    'minQty': 0.001,
+    'stepSize': 0.001,
+    'tickSize': 0.01,
+    'stepInv': 1000.0,
+    'tickInv': 100.0,
+}
+
+# Connection pool: one long-lived HTTP/2 session multiplexes concurrent signed calls
+HTTP_LIMITS = httpx.Limits(max_connections=64, max_keepalive_connections=32, keepalive_expiry=90)
+
+
+@lru_cache(maxsize=64)
+def _clean_symbol(symbol: str) -> str:
+    """BTC/USDT -> BTCUSDT"""
+    return symbol.replace("/", "")
+
+
+# Values made only of these characters are the same before and after URL quoting
+_is_url_safe = re.compile(r'[A-Za-z0-9._-]*').fullmatch
+
+
+def _build_query(params: dict) -> str:
+    """urlencode() for the flat params Binance takes, skipping quote_plus for plain values."""
+    parts = []
+    for key, value in params.items():
+        text = str(value)
+        if 'e' in text and isinstance(value, float):
+            # Binance rejects exponent notation; rounded prices like 1.2e-06 go out as 0.0000012
+            text = format(Decimal(text), 'f')
+        if _is_url_safe(text):
+            parts.append(f"{key}={text}")
+        else:
+            parts.append(f"{quote_plus(key)}={quote_plus(text)}")
+    return "&".join(parts)
+
+
+class TokenBucket:
+    """
+    Refills at rate tokens/second up to capacity. acquire() reserves its tokens
+    immediately (the balance may go negative) and sleeps off its share of the deficit,
+    so waiters are served in arrival order without holding a lock while sleeping.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._last_refill = time.monotonic()
+
+    async def acquire(self, tokens: float = 1.0):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._last_refill) * self.rate)
+        self._last_refill = now
+        self._tokens -= tokens
+
+        if self._tokens < 0:
+            wait_time = -self._tokens / self.rate
+            logger.warning(f"Rate limit approaching, waiting {wait_time:.1f}s")
+            await asyncio.sleep(wait_time)
 
 
 class APICache:
-    """Shared cache for API responses to reduce duplicate calls."""
+    """
+    Shared cache for API responses to reduce duplicate calls.
+
+    Entries are served until their TTL runs out, but past REFRESH_AFTER of it they
+    report as stale so callers can refresh them in the background (stale-while-revalidate).
+    """
+
+    REFRESH_AFTER = 0.8
 
     def __init__(self):
-        self._cache: Dict[str, Any] = {}
-        self._timestamps: Dict[str, datetime] = {}
+        # key -> (value, refresh_at, expires_at), both deadlines in time.monotonic() seconds
+        self._cache: Dict[str, tuple] = {}
         self._ttl: Dict[str, int] = {
             'account_data': 30,  # 30 seconds - raw account data
             'balance': 30,       # 30 seconds
@@ -36,28 +154,33 @@ class APICache:
 
     def get(self, key: str) -> Optional[Any]:
         """Get cached value if not expired."""
-        if key not in self._cache:
-            return None
-
-        ttl = self._ttl.get(key.split(':')[0], 5)
-        if datetime.now() - self._timestamps.get(key, datetime.min) > timedelta(seconds=ttl):
+        entry = self._cache.get(key)
+        if entry is None or time.monotonic() > entry[2]:
             return None
+        return entry[0]
 
-        return self._cache[key]
+    def is_stale(self, key: str) -> bool:
+        """True once an entry is due for a refresh (or missing)."""
+        entry = self._cache.get(key)
+        return entry is None or time.monotonic() >= entry[1]
 
     def set(self, key: str, value: Any):
         """Cache a value."""
-        self._cache[key] = value
-        self._timestamps[key] = datetime.now()
+        ttl = self._ttl.get(key.split(':')[0], 5)
+        now = time.monotonic()
+        self._cache[key] = (value, now + ttl * self.REFRESH_AFTER, now + ttl)
 
     def invalidate(self, key: str = None):
         """Invalidate cache entry or all entries."""
         if key:
             self._cache.pop(key, None)
-            self._timestamps.pop(key, None)
         else:
             self._cache.clear()
-            self._timestamps.clear()
+
+    def invalidate_prefix(self, prefix: str):
+        """Invalidate every entry whose key starts with prefix (e.g. 'open_orders:')."""
+        for key in [k for k in self._cache if k.startswith(prefix)]:
+            del self._cache[key]
 
 
 class BinanceClient:
@@ -65,81 +188,123 @@ class BinanceClient:
         self._load_env()
         self.client: Optional[httpx.AsyncClient] = None
         self._symbol_info: dict = {}  # Cache for symbol precision info
+        self._exchange_info_loaded = False
+        self._exchange_info_validators: dict = {}  # ETag / Last-Modified of the cached copy
 
         # Rate limiting
-        self._request_times: list = []
-        self._rate_limit_lock = asyncio.Lock()
+        self._rate_limiter = TokenBucket(MAX_REQUESTS_PER_MINUTE / RATE_LIMIT_WINDOW, MAX_REQUESTS_PER_MINUTE)
+        self._order_limiter = TokenBucket(ORDER_LIMIT_PER_WINDOW / ORDER_RATE_WINDOW, ORDER_LIMIT_PER_WINDOW)
 
         # Backoff state
-        self._backoff_until: Optional[datetime] = None
+        self._backoff_until: Optional[float] = None  # time.monotonic() deadline
         self._consecutive_errors = 0
         self._max_backoff_seconds = 300  # 5 minutes max backoff
 
+        # Binance server time minus local time, applied to signed timestamps
+        self._server_offset_ms = 0
+
+        # Last X-MBX-USED-WEIGHT-1M reported by Binance and when it was seen
+        self._used_weight = 0
+        self._used_weight_at = 0.0
+
         # Shared cache
         self.cache = APICache()
 
+        # Raw /fapi/v2/account payload: (data, monotonic time) and the in-flight fetch, if any
+        self._account_snapshot: tuple = (None, 0.0)
+        self._account_inflight: Optional[asyncio.Future] = None
+        self._account_refresh: Optional[asyncio.Task] = None
+        # Bumped whenever an order makes the account stale; fetches started under an
+        # older generation still answer their callers but are not cached
+        self._account_generation = 0
+
+        # User-data stream state; while live, open orders are served from _orders_snapshot
+        self._user_stream_running = False
+        self._user_stream_live = False
+        self._user_ws = None
+        self._orders_snapshot: Dict[str, dict] = {}  # orderId -> raw order
+        self._closed_order_ids: Dict[str, None] = {}  # insertion-ordered, oldest trimmed first
+
     def _load_env(self):
-        load_dotenv()
+        load_env()
         self.api_key = os.getenv("BINANCE_API_KEY")
         self.api_secret = os.getenv("BINANCE_API_SECRET")
         self.env_type = os.getenv("BINANCE_ENV", "testnet").lower()
 
         if self.env_type == "testnet":
             self.base_url = TESTNET_BASE_URL
+            self.user_stream_url = TESTNET_USER_STREAM_URL
         else:
             self.base_url = MAINNET_BASE_URL
+            self.user_stream_url = MAINNET_USER_STREAM_URL
 
         if not self.api_key or not self.api_secret:
             logger.warning("Binance API credentials missing! Check .env")
 
-    def _sign(self, params: dict) -> str:
-        """Creates HMAC SHA256 signature for request."""
-        query_string = urlencode(params)
-        signature = hmac.new(
-            self.api_secret.encode('utf-8'),
-            query_string.encode('utf-8'),
-            hashlib.sha256
-        ).hexdigest()
-        return signature
+        # Keyed HMAC state computed once; _sign copies it instead of redoing the key setup
+        self._hmac_proto = hmac.new((self.api_secret or "").encode('utf-8'), b"", hashlib.sha256)
+
+    def _sign(self, query_string: str) -> str:
+        """Creates HMAC SHA256 signature for an encoded query string."""
+        mac = self._hmac_proto.copy()
+        mac.update(query_string.encode('utf-8'))
+        return mac.hexdigest()
 
     def _get_timestamp(self) -> int:
-        """Returns current timestamp in milliseconds."""
-        return int(time.time() * 1000)
+        """Returns current timestamp in milliseconds, corrected to Binance server time."""
+        return time.time_ns() // 1_000_000 + self._server_offset_ms
+
+    async def sync_server_time(self):
+        """Measures the offset between the local clock and Binance server time."""
+        try:
+            sent = time.time_ns() // 1_000_000
+            data = await self._request("GET", "/fapi/v1/time", signed=False)
+            received = time.time_ns() // 1_000_000
+        except Exception as e:
+            logger.warning(f"Could not sync server time: {e}")
+            return
+        # Assume the server stamped the response halfway through the round trip
+        self._server_offset_ms = int(data['serverTime']) - (sent + received) // 2
+        logger.info(f"Server time offset: {self._server_offset_ms}ms")
+
+    async def time_sync_loop(self, interval_seconds: float = TIME_SYNC_INTERVAL_SECONDS):
+        """Re-syncs the server time offset periodically for long-running processes."""
+        while True:
+            await asyncio.sleep(interval_seconds)
+            await self.sync_server_time()
 
     async def initialize(self):
-        """Initializes the HTTP client."""
+        """Initializes the HTTP client, syncs server time and preloads trading rules for every symbol."""
+        if self.client:
+            return
+        # Accept-Encoding is left to httpx: it adds br/zstd when brotli/zstandard are installed
         self.client = httpx.AsyncClient(
             base_url=self.base_url,
             headers={"X-MBX-APIKEY": self.api_key},
-            timeout=30.0
+            timeout=30.0,
+            http2=True,
+            limits=HTTP_LIMITS,
         )
         logger.info(f"Binance Client initialized in {self.env_type.upper()} mode")
+        await asyncio.gather(self.sync_server_time(), self._load_exchange_info())
 
     async def close(self):
         """Closes the HTTP client."""
         if self.client:
             await self.client.aclose()
+            self.client = None
             logger.info("Binance client connection closed")
 
-    async def _check_rate_limit(self):
-        """Check and enforce rate limiting."""
-        async with self._rate_limit_lock:
-            now = time.time()
-            # Remove old requests outside the window
-            self._request_times = [t for t in self._request_times if now - t < RATE_LIMIT_WINDOW]
-
-            if len(self._request_times) >= MAX_REQUESTS_PER_MINUTE:
-                wait_time = RATE_LIMIT_WINDOW - (now - self._request_times[0])
-                if wait_time > 0:
-                    logger.warning(f"Rate limit approaching, waiting {wait_time:.1f}s")
-                    await asyncio.sleep(wait_time)
-
-            self._request_times.append(now)
+    async def _check_rate_limit(self, weight: int = 1, is_order: bool = False):
+        """Check and enforce rate limiting; order calls also draw from the order-count bucket."""
+        await self._rate_limiter.acquire(weight)
+        if is_order:
+            await self._order_limiter.acquire()
 
     async def _check_backoff(self):
         """Check if we're in backoff period."""
-        if self._backoff_until and datetime.now() < self._backoff_until:
-            wait_seconds = (self._backoff_until - datetime.now()).total_seconds()
+        if self._backoff_until and time.monotonic() < self._backoff_until:
+            wait_seconds = self._backoff_until - time.monotonic()
             logger.warning(f"In backoff period, waiting {wait_seconds:.1f}s")
             await asyncio.sleep(wait_seconds)
 
@@ -149,149 +314,280 @@ class BinanceClient:
         backoff = min(base_delay * (2 ** self._consecutive_errors), self._max_backoff_seconds)
         return backoff
 
-    async def _request(self, method: str, endpoint: str, params: dict = None, signed: bool = True) -> dict:
-        """Makes an API request to Binance with rate limiting and backoff."""
-        if not self.client:
-            await self.initialize()
+    def _track_used_weight(self, response: httpx.Response):
+        weight = response.headers.get('X-MBX-USED-WEIGHT-1M')
+        if weight:
+            self._used_weight = int(weight)
+            self._used_weight_at = time.time()
+
+    async def _check_used_weight(self):
+        """Pauses until the next weight window when the current one is nearly used up."""
+        if self._used_weight < WEIGHT_LIMIT_PER_MINUTE * WEIGHT_PACING_THRESHOLD:
+            return
+        now = time.time()
+        if int(now // 60) == int(self._used_weight_at // 60):
+            wait_seconds = 60 - now % 60
+            logger.warning(f"Used weight {self._used_weight}/{WEIGHT_LIMIT_PER_MINUTE}, waiting {wait_seconds:.1f}s")
+            await asyncio.sleep(wait_seconds)
+        self._used_weight = 0
 
-        # Check backoff first
-        await self._check_backoff()
+    @staticmethod
+    def _retry_delay(method: str, response: httpx.Response, attempt: int) -> Optional[float]:
+        """Seconds to wait before retrying a failed request in place, or None to give up."""
+        status_code = response.status_code
+        if attempt >= MAX_RETRIES:
+            return None
+        if status_code != 429 and not (status_code in RETRYABLE_SERVER_ERRORS and method == "GET"):
+            return None
 
-        # Then check rate limit
-        await self._check_rate_limit()
+        delay = float(2 ** attempt)
+        retry_after = response.headers.get('Retry-After')
+        if retry_after:
+            try:
+                delay = max(delay, float(retry_after))
+            except ValueError:
+                pass
+        return delay if delay <= MAX_RETRY_DELAY else None
+
+    async def _request(self, method: str, endpoint: str, params: dict = None, signed: bool = True,
+                       weight: int = 1, is_order: bool = False) -> dict:
+        """
+        Makes an API request to Binance with rate limiting, backoff and short in-place retries.
+        weight is the endpoint's request weight; is_order marks calls counted against the order limit.
+        """
+        if not self.client:
+            await self.initialize()
 
         params = params or {}
 
-        if signed:
-            params['timestamp'] = self._get_timestamp()
-            params['signature'] = self._sign(params)
-
-        try:
-            if method == "GET":
-                response = await self.client.get(endpoint, params=params)
-            elif method == "POST":
-                response = await self.client.post(endpoint, params=params)
-            elif method == "DELETE":
-                response = await self.client.delete(endpoint, params=params)
-            else:
-                raise ValueError(f"Unsupported HTTP method: {method}")
-
-            response.raise_for_status()
-
-            # Reset error count on success
-            self._consecutive_errors = 0
-            self._backoff_until = None
+        if method not in ("GET", "POST", "PUT", "DELETE"):
+            raise ValueError(f"Unsupported HTTP method: {method}")
+
+        for attempt in range(MAX_RETRIES + 1):
+            # Check backoff first
+            await self._check_backoff()
+
+            # Then check rate limit and the weight Binance reported
+            await self._check_rate_limit(weight, is_order)
+            await self._check_used_weight()
+
+            # Encode once and sign exactly the bytes that go on the wire. Retries re-sign
+            # because the timestamp has to stay inside Binance's recvWindow.
+            if signed:
+                params['timestamp'] = self._get_timestamp()
+            query_string = _build_query(params)
+            if signed:
+                query_string = f"{query_string}&signature={self._sign(query_string)}"
+
+            try:
+                if method == "POST":
+                    # POST parameters go in a form body rather than the URL
+                    response = await self.client.request(
+                        method, endpoint, content=query_string.encode('utf-8'), headers=FORM_HEADERS
+                    )
+                else:
+                    url = f"{endpoint}?{query_string}" if query_string else endpoint
+                    response = await self.client.request(method, url)
+
+                self._track_used_weight(response)
+                response.raise_for_status()
+
+                # Reset error count on success
+                self._consecutive_errors = 0
+                self._backoff_until = None
+
+                return json_loads(response.content)
+
+            except httpx.HTTPStatusError as e:
+                status_code = e.response.status_code
+                error_data = json_loads(e.response.content) if e.response.content else {}
+
+                retry_delay = self._retry_delay(method, e.response, attempt)
+                if retry_delay is not None:
+                    logger.warning(f"HTTP {status_code} on {method} {endpoint}, retrying in {retry_delay:.1f}s "
+                                   f"(attempt {attempt + 1}/{MAX_RETRIES})")
+                    await asyncio.sleep(retry_delay)
+                    continue
+
+                # Handle rate limiting (429) and IP ban (418)
+                if status_code in [418, 429]:
+                    self._consecutive_errors += 1
+                    backoff_seconds = self._calculate_backoff()
+
+                    # Check for Retry-After header
+                    retry_after = e.response.headers.get('Retry-After')
+                    if retry_after:
+                        try:
+                            backoff_seconds = max(backoff_seconds, int(retry_after))
+                        except ValueError:
+                            pass
+
+                    self._backoff_until = time.monotonic() + backoff_seconds
+                    logger.error(f"Rate limited (HTTP {status_code}). Backing off for {backoff_seconds}s. "
+                                f"Consecutive errors: {self._consecutive_errors}")
+
+                    raise Exception(f"Rate limited: {error_data.get('msg', str(e))}. Retry after {backoff_seconds}s")
+
+                logger.error(f"Binance API error: {status_code} - {error_data}")
+                raise Exception(f"Binance API error: {error_data.get('msg', str(e))}")
+            except Exception as e:
+                logger.error(f"Request failed: {e}")
+                raise
 
-            return response.json()
+    # ============ Symbol Info ============
 
-        except httpx.HTTPStatusError as e:
-            status_code = e.response.status_code
-            error_data = e.response.json() if e.response.content else {}
+    @property
+    def _exchange_info_cache_path(self) -> str:
+        # Testnet and mainnet list different symbols and filters
+        return os.path.join(EXCHANGE_INFO_CACHE_DIR, f"exchangeInfo-{self.env_type}.json")
 
-            # Handle rate limiting (429) and IP ban (418)
-            if status_code in [418, 429]:
-                self._consecutive_errors += 1
-                backoff_seconds = self._calculate_backoff()
+    def _read_exchange_info_cache(self):
+        try:
+            with open(self._exchange_info_cache_path, "rb") as f:
+                cached = json_loads(f.read())
+            if cached.get('version') != EXCHANGE_INFO_CACHE_VERSION:
+                return
+            self._symbol_info = cached['symbols']
+            self._exchange_info_validators = cached.get('validators', {})
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+
+    def _write_exchange_info_cache(self):
+        try:
+            os.makedirs(EXCHANGE_INFO_CACHE_DIR, exist_ok=True)
+            with open(self._exchange_info_cache_path, "w") as f:
+                json.dump({
+                    'version': EXCHANGE_INFO_CACHE_VERSION,
+                    'validators': self._exchange_info_validators,
+                    'symbols': self._symbol_info,
+                }, f)
+        except OSError as e:
+            logger.warning(f"Could not write exchangeInfo cache: {e}")
+
+    async def _fetch_exchange_info(self) -> Optional[httpx.Response]:
+        """Conditional GET of exchangeInfo; returns None when the cached copy is still current."""
+        if not self.client:
+            await self.initialize()
+        await self._check_backoff()
+        await self._check_rate_limit()
+        await self._check_used_weight()
 
-                # Check for Retry-After header
-                retry_after = e.response.headers.get('Retry-After')
-                if retry_after:
-                    try:
-                        backoff_seconds = max(backoff_seconds, int(retry_after))
-                    except ValueError:
-                        pass
+        headers = {}
+        if 'etag' in self._exchange_info_validators:
+            headers['If-None-Match'] = self._exchange_info_validators['etag']
+        if 'last_modified' in self._exchange_info_validators:
+            headers['If-Modified-Since'] = self._exchange_info_validators['last_modified']
 
-                self._backoff_until = datetime.now() + timedelta(seconds=backoff_seconds)
-                logger.error(f"Rate limited (HTTP {status_code}). Backing off for {backoff_seconds}s. "
-                            f"Consecutive errors: {self._consecutive_errors}")
+        response = await self.client.get("/fapi/v1/exchangeInfo", headers=headers)
+        self._track_used_weight(response)
+        if response.status_code == 304:
+            return None
+        response.raise_for_status()
+        return response
 
-                raise Exception(f"Rate limited: {error_data.get('msg', str(e))}. Retry after {backoff_seconds}s")
+    async def _load_exchange_info(self):
+        """
+        Caches trading rules (precision, min qty, etc) for all symbols. Starts from the copy
+        on disk and only downloads exchangeInfo again when the server says it changed.
+        """
+        if not self._symbol_info:
+            self._read_exchange_info_cache()
 
-            logger.error(f"Binance API error: {status_code} - {error_data}")
-            raise Exception(f"Binance API error: {error_data.get('msg', str(e))}")
+        try:
+            response = await self._fetch_exchange_info()
         except Exception as e:
-            logger.error(f"Request failed: {e}")
-            raise
-
-    # ============ Symbol Info ============
+            if self._symbol_info:
+                logger.warning(f"Could not refresh symbol info, using cached copy: {e}")
+                self._exchange_info_loaded = True
+            else:
+                logger.warning(f"Could not load symbol info: {e}")
+            return
+
+        if response is None:
+            self._exchange_info_loaded = True
+            logger.info(f"exchangeInfo unchanged, using cached rules for {len(self._symbol_info)} symbols")
+            return
+
+        self._symbol_info = self._parse_symbol_rules(json_loads(response.content))
+        self._exchange_info_validators = {
+            key: response.headers[header]
+            for key, header in (('etag', 'ETag'), ('last_modified', 'Last-Modified'))
+            if header in response.headers
+        }
+        self._exchange_info_loaded = True
+        logger.info(f"Loaded trading rules for {len(self._symbol_info)} symbols")
+        await asyncio.to_thread(self._write_exchange_info_cache)
+
+    async def exchange_info_refresh_loop(self, interval_seconds: float = EXCHANGE_INFO_REFRESH_SECONDS):
+        """Revalidates the cached trading rules periodically for long-running processes."""
+        while True:
+            await asyncio.sleep(interval_seconds)
+            await self._load_exchange_info()
+
+    @staticmethod
+    def _parse_symbol_rules(data: dict) -> dict:
+        rules = {}
+        for s in data.get('symbols', []):
+            sym = s.get('symbol')
+
+            # Extract precision info; only two of the ~8 filters per symbol are needed
+            lot_size = price_filter = {}
+            for f in s.get('filters', ()):
+                filter_type = f.get('filterType')
+                if filter_type == 'LOT_SIZE':
+                    lot_size = f
+                elif filter_type == 'PRICE_FILTER':
+                    price_filter = f
+
+            step_size = float(lot_size.get('stepSize', 0.001))
+            tick_size = float(price_filter.get('tickSize', 0.01))
+
+            rules[sym] = {
+                'quantityPrecision': s.get('quantityPrecision', 3),
+                'pricePrecision': s.get('pricePrecision', 2),
+                'minQty': float(lot_size.get('minQty', 0.001)),
+                'stepSize': step_size,
+                'tickSize': tick_size,
+                # Reciprocals so rounding multiplies instead of divides
+                'stepInv': 1.0 / step_size,
+                'tickInv': 1.0 / tick_size,
+            }
+        return rules
 
     async def load_symbol_info(self, symbol: str) -> dict:
-        """Loads and caches symbol trading rules (precision, min qty, etc)."""
-        symbol_clean = symbol.replace("/", "")
-
-        if symbol_clean in self._symbol_info:
-            return self._symbol_info[symbol_clean]
-
-        try:
-            data = await self._request("GET", "/fapi/v1/exchangeInfo", signed=False)
-
-            for s in data.get('symbols', []):
-                sym = s.get('symbol')
-                filters = {f['filterType']: f for f in s.get('filters', [])}
-
-                # Extract precision info
-                lot_size = filters.get('LOT_SIZE', {})
-                price_filter = filters.get('PRICE_FILTER', {})
-
-                self._symbol_info[sym] = {
-                    'quantityPrecision': s.get('quantityPrecision', 3),
-                    'pricePrecision': s.get('pricePrecision', 2),
-                    'minQty': float(lot_size.get('minQty', 0.001)),
-                    'stepSize': float(lot_size.get('stepSize', 0.001)),
-                    'tickSize': float(price_filter.get('tickSize', 0.01)),
-                }
-
-            return self._symbol_info.get(symbol_clean, {
-                'quantityPrecision': 3,
-                'pricePrecision': 2,
-                'minQty': 0.001,
-                'stepSize': 0.001,
-                'tickSize': 0.01
-            })
-
-        except Exception as e:
-            logger.warning(f"Could not load symbol info: {e}")
-            return {'quantityPrecision': 3, 'pricePrecision': 2}
+        """Returns cached symbol trading rules, loading exchangeInfo if startup could not."""
+        if not self._exchange_info_loaded:
+            await self._load_exchange_info()
+        return self._symbol_info.get(_clean_symbol(symbol), DEFAULT_SYMBOL_INFO)
 
     def round_quantity(self, symbol: str, quantity: float) -> float:
         """Rounds quantity to valid precision for the symbol."""
-        # Convert numpy floats to Python floats
-        if hasattr(quantity, 'item'):
-            quantity = quantity.item()
+        # float() takes numpy scalars directly, no .item() probe needed
         quantity = float(quantity)
 
-        symbol_clean = symbol.replace("/", "")
-        info = self._symbol_info.get(symbol_clean, {})
-        precision = info.get('quantityPrecision', 3)
-        step_size = info.get('stepSize', 0.001)
+        info = self._symbol_info.get(_clean_symbol(symbol), DEFAULT_SYMBOL_INFO)
 
-        # Round to step size
-        rounded = round(quantity / step_size) * step_size
-        # Then round to precision
-        return round(rounded, precision)
+        # Snap to the step grid, then round to precision to drop float noise (0.30000000000000004)
+        rounded = round(quantity * info['stepInv']) * info['stepSize']
+        return round(rounded, info['quantityPrecision'])
 
     def round_price(self, symbol: str, price: float) -> float:
         """Rounds price to valid precision for the symbol."""
-        # Convert numpy floats to Python floats
-        if hasattr(price, 'item'):
-            price = price.item()
+        # float() takes numpy scalars directly, no .item() probe needed
         price = float(price)
 
-        symbol_clean = symbol.replace("/", "")
-        info = self._symbol_info.get(symbol_clean, {})
-        precision = info.get('pricePrecision', 2)
-        tick_size = info.get('tickSize', 0.01)
+        info = self._symbol_info.get(_clean_symbol(symbol), DEFAULT_SYMBOL_INFO)
 
-        # Round to tick size
-        rounded = round(price / tick_size) * tick_size
-        return round(rounded, precision)
+        # Snap to the tick grid, then round to precision
+        rounded = round(price * info['tickInv']) * info['tickSize']
+        return round(rounded, info['pricePrecision'])
 
     # ============ Public Endpoints ============
 
-    async def fetch_ohlcv(self, symbol: str, timeframe: str, limit: int = 200) -> list:
+    async def fetch_ohlcv(self, symbol: str, timeframe: str, limit: int = 200) -> np.ndarray:
         """Fetches OHLCV candlestick data."""
         # Convert symbol format: BTC/USDT -> BTCUSDT
-        symbol_clean = symbol.replace("/", "")
+        symbol_clean = _clean_symbol(symbol)
 
         params = {
             "symbol": symbol_clean,
@@ -299,25 +595,28 @@ class BinanceClient:
             "limit": limit
         }
 
-        data = await self._request("GET", "/fapi/v1/klines", params, signed=False)
-
-        # Convert to standard format: [timestamp, open, high, low, close, volume]
-        return [
-            [
-                candle[0],              # timestamp
-                float(candle[1]),       # open
-                float(candle[2]),       # high
-                float(candle[3]),       # low
-                float(candle[4]),       # close
-                float(candle[5])        # volume
-            ]
-            for candle in data
-        ]
+        # Kline weight grows with the page size
+        weight = 1 if limit < 100 else 2 if limit < 500 else 5 if limit <= 1000 else 10
+        data = await self._request("GET", "/fapi/v1/klines", params, signed=False, weight=weight)
+
+        # Standard format: float64 rows of [timestamp, open, high, low, close, volume].
+        # Stored column-major (one contiguous array per field) and returned as the (N, 6)
+        # transpose, so candles[:, j] column views need no copy to be contiguous.
+        # Filled column by column so numpy parses the price strings straight into
+        # the array, without an intermediate list of Python floats per candle.
+        columns = np.empty((6, len(data)), dtype=np.float64)
+        for j in range(6):
+            columns[j] = [candle[j] for candle in data]
+        return columns.T
 
     # ============ Account Endpoints ============
 
     async def _fetch_account_data(self, use_cache: bool = True) -> dict:
-        """Fetches account data with caching to reduce duplicate API calls."""
+        """Fetches account data with caching to reduce duplicate API calls.
+
+        Even with use_cache=False, concurrent callers share one in-flight request and
+        a payload fetched within ACCOUNT_COALESCE_SECONDS is reused.
+        """
         cache_key = 'account_data'
 
         if use_cache:
@@ -326,10 +625,81 @@ class BinanceClient:
                 logger.info("Using cached account data")
                 return cached
 
-        data = await self._request("GET", "/fapi/v2/account")
-        self.cache.set(cache_key, data)
+        # With the user stream live, account changes invalidate the snapshot as they happen
+        max_age = ACCOUNT_STREAM_MAX_AGE if self._user_stream_live else ACCOUNT_COALESCE_SECONDS
+        data, fetched_at = self._account_snapshot
+        if data is not None and time.monotonic() - fetched_at < max_age:
+            return data
+
+        if self._account_inflight is not None:
+            return await asyncio.shield(self._account_inflight)
+
+        generation = self._account_generation
+        inflight = asyncio.get_running_loop().create_future()
+        self._account_inflight = inflight
+        try:
+            data = await self._request("GET", "/fapi/v2/account", weight=5)
+        except asyncio.CancelledError:
+            inflight.cancel()
+            raise
+        except Exception as e:
+            inflight.set_exception(e)
+            # Mark retrieved so the event loop doesn't warn when nobody else was waiting
+            inflight.exception()
+            raise
+        finally:
+            if self._account_inflight is inflight:
+                self._account_inflight = None
+
+        inflight.set_result(data)
+        if generation == self._account_generation:
+            self._account_snapshot = (data, time.monotonic())
+            self.cache.set(cache_key, data)
         return data
 
+    def _refresh_account_in_background(self):
+        """Starts a balance/positions refresh unless one is already running."""
+        if self._account_refresh is None or self._account_refresh.done():
+            self._account_refresh = asyncio.create_task(self._refresh_account())
+
+    async def _refresh_account(self):
+        # Goes again if an order invalidated the account while the fetch was in flight
+        generation = None
+        while generation != self._account_generation:
+            generation = self._account_generation
+            try:
+                # Both read the same coalesced /fapi/v2/account request
+                await asyncio.gather(self.get_balance(use_cache=False), self.fetch_positions(use_cache=False))
+            except Exception as e:
+                logger.warning(f"Background account refresh failed: {e}")
+                return
+
+    async def refresh_state(self, use_cache: bool = True) -> tuple:
+        """Fetches (balance, positions, open_orders) concurrently over the shared connection.
+
+        Balance and positions read one coalesced /fapi/v2/account request, so a cold
+        refresh costs two requests in flight together instead of three in a row.
+        """
+        return await asyncio.gather(
+            self.get_balance(use_cache),
+            self.fetch_positions(use_cache),
+            self.fetch_open_orders(use_cache=use_cache),
+        )
+
+    def _invalidate_account(self):
+        """Drops every cached view of the account after an order changes it."""
+        self.cache.invalidate()
+        self._account_generation += 1
+        self._account_snapshot = (None, 0.0)
+        self._account_inflight = None
+
+    def _revalidate_account(self):
+        """Keeps serving cached balance/positions while a fresh account payload is fetched."""
+        self._account_generation += 1
+        self._account_snapshot = (None, 0.0)
+        self._account_inflight = None
+        self._refresh_account_in_background()
+
     async def get_balance(self, use_cache: bool = True) -> dict:
         """Fetches account balance with caching."""
         cache_key = 'balance'
@@ -338,8 +708,11 @@ class BinanceClient:
             cached = self.cache.get(cache_key)
             if cached:
                 logger.info("Using cached balance")
+                if self.cache.is_stale(cache_key):
+                    self._refresh_account_in_background()
                 return cached
 
+        generation = self._account_generation
         data = await self._fetch_account_data(use_cache=False)
 
         usdt_balance = 0
@@ -358,44 +731,68 @@ class BinanceClient:
             'info': {'totalUnrealizedProfit': unrealized_pnl}
         }
 
-        self.cache.set(cache_key, result)
+        if generation == self._account_generation:
+            self.cache.set(cache_key, result)
         return result
 
-    async def fetch_positions(self, use_cache: bool = True) -> list:
-        """Fetches all open positions with caching."""
-        cache_key = 'positions'
+    async def fetch_positions(self, use_cache: bool = True, include_raw: bool = False) -> list:
+        """Fetches all open positions with caching. include_raw adds the raw row under 'info'."""
+        cache_key = 'positions:raw' if include_raw else 'positions'
 
         if use_cache:
             cached = self.cache.get(cache_key)
             if cached is not None:
                 logger.info("Using cached positions")
+                if self.cache.is_stale(cache_key):
+                    self._refresh_account_in_background()
                 return cached
 
+        generation = self._account_generation
         data = await self._fetch_account_data(use_cache=False)
         positions = data.get('positions', [])
 
         result = []
         for p in positions:
-            amt = float(p.get('positionAmt', 0))
+            # Most rows are flat; skip them on the raw string before parsing anything
+            amt_str = p['positionAmt']
+            if amt_str in ZERO_AMOUNTS:
+                continue
+            amt = float(amt_str)
             if amt != 0:
-                result.append({
-                    'symbol': p.get('symbol'),
+                # Index the fields /fapi/v2/account always sends; .get() only for the optional ones
+                position = {
+                    'symbol': p['symbol'],
                     'contracts': abs(amt),
                     'side': 'long' if amt > 0 else 'short',
-                    'entryPrice': float(p.get('entryPrice', 0)),
+                    'entryPrice': float(p['entryPrice']),
                     'markPrice': float(p.get('markPrice', 0)),
-                    'unrealizedPnl': float(p.get('unrealizedProfit', 0)),
+                    'unrealizedPnl': float(p['unrealizedProfit']),
                     'marginMode': p.get('marginType', '').lower(),
-                    'leverage': int(p.get('leverage', 1)),
-                    'info': p
-                })
+                    'leverage': int(p['leverage']),
+                }
+                if include_raw:
+                    position['info'] = p
+                result.append(position)
 
-        self.cache.set(cache_key, result)
+        if generation == self._account_generation:
+            self.cache.set(cache_key, result)
         return result
 
-    async def fetch_open_orders(self, symbol: str = None, use_cache: bool = True) -> list:
-        """Fetches all open orders with caching."""
-        cache_key = f'open_orders:{symbol or "all"}'
+    async def fetch_open_orders(self, symbol: str = None, use_cache: bool = True, include_raw: bool = False) -> list:
+        """
+        Fetches all open orders, from the user stream when it is live, otherwise via REST with caching.
+        include_raw adds the raw order under 'info'.
+        """
+        symbol_clean = _clean_symbol(symbol) if symbol else None
+
+        if self._user_stream_live:
+            return [
+                self._format_order(order, include_raw)
+                for order in self._orders_snapshot.values()
+                if symbol_clean is None or order.get('symbol') == symbol_clean
+            ]
+
+        cache_key = f'open_orders:{symbol_clean or "all"}{":raw" if include_raw else ""}'
 
         if use_cache:
             cached = self.cache.get(cache_key)
@@ -404,33 +801,38 @@ class BinanceClient:
                 return cached
 
         params = {}
-        if symbol:
-            params['symbol'] = symbol.replace("/", "")
-
-        data = await self._request("GET", "/fapi/v1/openOrders", params)
-
-        result = [
-            {
-                'id': str(order.get('orderId')),
-                'symbol': order.get('symbol'),
-                'type': order.get('type'),
-                'side': order.get('side').lower(),
-                'price': float(order.get('price', 0)),
-                'amount': float(order.get('origQty', 0)),
-                'stopPrice': float(order.get('stopPrice', 0)),
-                'reduceOnly': order.get('reduceOnly', False),
-                'status': order.get('status'),
-                'info': order
-            }
-            for order in data
-        ]
+        if symbol_clean:
+            params['symbol'] = symbol_clean
+
+        # Weight 1 for one symbol, 40 for all of them
+        data = await self._request("GET", "/fapi/v1/openOrders", params, weight=1 if symbol_clean else 40)
+
+        result = [self._format_order(order, include_raw) for order in data]
 
         self.cache.set(cache_key, result)
         return result
 
+    @staticmethod
+    def _format_order(order: dict, include_raw: bool = False) -> dict:
+        # REST orders and stream-built snapshot entries always carry these fields
+        result = {
+            'id': str(order['orderId']),
+            'symbol': order['symbol'],
+            'type': order['type'],
+            'side': order['side'].lower(),
+            'price': float(order['price']),
+            'amount': float(order['origQty']),
+            'stopPrice': float(order['stopPrice']),
+            'reduceOnly': order.get('reduceOnly', False),
+            'status': order['status'],
+        }
+        if include_raw:
+            result['info'] = order
+        return result
+
     async def fetch_user_trades(self, symbol: str, limit: int = 10) -> list:
         """Fetches recent user trades for a symbol to determine fill info."""
-        symbol_clean = symbol.replace("/", "")
+        symbol_clean = _clean_symbol(symbol)
 
         params = {
             'symbol': symbol_clean,
@@ -464,7 +866,7 @@ class BinanceClient:
 
     async def fetch_order(self, symbol: str, order_id: str) -> dict:
         """Fetches a specific order by ID to get its type."""
-        symbol_clean = symbol.replace("/", "")
+        symbol_clean = _clean_symbol(symbol)
 
         params = {
             'symbol': symbol_clean,
@@ -491,19 +893,124 @@ class BinanceClient:
             logger.error(f"Failed to fetch order {order_id} for {symbol}: {e}")
             return {}
 
+    # ============ User Data Stream ============
+
+    async def start_user_stream(self):
+        """
+        Keeps order and account state current from the user-data WebSocket.
+        Runs until stop_user_stream() or cancellation, reconnecting on errors; REST is
+        used whenever the stream is down.
+        """
+        self._user_stream_running = True
+
+        while self._user_stream_running:
+            keepalive = None
+            try:
+                data = await self._request("POST", "/fapi/v1/listenKey", signed=False)
+                url = f"{self.user_stream_url}/{data['listenKey']}"
+
+                async with websockets.connect(url, ping_interval=20, ping_timeout=10) as ws:
+                    self._user_ws = ws
+                    # Seed after connecting so nothing that happens in between is missed;
+                    # events buffered meanwhile are applied on top
+                    await self._seed_orders_snapshot()
+                    self._invalidate_account()
+                    self._user_stream_live = True
+                    keepalive = asyncio.create_task(self._keepalive_listen_key())
+                    logger.info("User data stream connected")
+
+                    async for message in ws:
+                        try:
+                            self._apply_user_event(json_loads(message))
+                        except Exception as e:
+                            logger.error(f"Error processing user stream event: {e}")
+            except websockets.ConnectionClosed as e:
+                logger.warning(f"User data stream closed: {e}")
+            except Exception as e:
+                logger.error(f"User data stream error: {e}")
+            finally:
+                self._user_stream_live = False
+                self._user_ws = None
+                if keepalive:
+                    keepalive.cancel()
+
+            if self._user_stream_running:
+                await asyncio.sleep(USER_STREAM_RECONNECT_DELAY)
+
+    async def stop_user_stream(self):
+        """Stops the user-data stream; reads fall back to REST."""
+        self._user_stream_running = False
+        if self._user_ws:
+            await self._user_ws.close()
+
+    async def _keepalive_listen_key(self):
+        while True:
+            await asyncio.sleep(LISTEN_KEY_KEEPALIVE_SECONDS)
+            try:
+                await self._request("PUT", "/fapi/v1/listenKey", signed=False)
+            except Exception as e:
+                logger.warning(f"listenKey keepalive failed: {e}")
+
+    async def _seed_orders_snapshot(self):
+        data = await self._request("GET", "/fapi/v1/openOrders", weight=40)
+        self._orders_snapshot = {str(order.get('orderId')): order for order in data}
+
+    def _forget_order(self, order_id: str):
+        """Drops a closed order from the snapshot and remembers it as closed."""
+        self._orders_snapshot.pop(order_id, None)
+        self._closed_order_ids[order_id] = None
+        if len(self._closed_order_ids) > CLOSED_ORDER_MEMORY:
+            del self._closed_order_ids[next(iter(self._closed_order_ids))]
+
+    def _apply_user_event(self, event: dict):
+        """Applies one user-data stream event to the local state."""
+        event_type = event.get('e')
+
+        if event_type == 'ORDER_TRADE_UPDATE':
+            o = event['o']
+            order_id = str(o['i'])
+            if o['X'] in CLOSED_ORDER_STATUSES:
+                self._forget_order(order_id)
+            elif order_id not in self._closed_order_ids:
+                # Same field names as the REST openOrders payload
+                self._orders_snapshot[order_id] = {
+                    'orderId': o['i'],
+                    'symbol': o['s'],
+                    'type': o['o'],
+                    'origType': o.get('ot'),
+                    'side': o['S'],
+                    'price': o['p'],
+                    'origQty': o['q'],
+                    'stopPrice': o['sp'],
+                    'reduceOnly': o.get('R', False),
+                    'status': o['X'],
+                }
+            if o.get('x') == 'TRADE':
+                self._invalidate_account()
+
+        elif event_type == 'ACCOUNT_UPDATE':
+            self._invalidate_account()
+
+        elif event_type == 'listenKeyExpired':
+            logger.warning("listenKey expired, reconnecting user data stream")
+            if self._user_ws:
+                asyncio.create_task(self._user_ws.close())
+
     # ============ Trading Endpoints ============
 
     async def create_order(self, symbol: str, order_type: str, side: str, amount: float,
-                           price: float = None, params: dict = None) -> dict:
+                           price: float = None, params: dict = None, include_raw: bool = False) -> dict:
         """Creates a new order with proper precision handling."""
-        symbol_clean = symbol.replace("/", "")
+        symbol_clean = _clean_symbol(symbol)
         params = params or {}
 
-        # Load symbol info for precision
-        await self.load_symbol_info(symbol)
+        # Symbol info for precision: a plain dict read once exchangeInfo is loaded,
+        # so only a failed startup load costs an await here
+        if not self._exchange_info_loaded:
+            await self._load_exchange_info()
 
         # Round quantity to valid precision
-        rounded_amount = self.round_quantity(symbol, amount)
+        rounded_amount = self.round_quantity(symbol_clean, amount)
 
         order_params = {
             "symbol": symbol_clean,
@@ -514,12 +1021,12 @@ class BinanceClient:
 
         # Add price for limit orders
         if price and order_type.upper() in ['LIMIT', 'STOP', 'TAKE_PROFIT']:
-            order_params['price'] = self.round_price(symbol, price)
+            order_params['price'] = self.round_price(symbol_clean, price)
             order_params['timeInForce'] = 'GTC'
 
         # Add stop price for stop orders
         if 'stopPrice' in params and params['stopPrice'] is not None:
-            order_params['stopPrice'] = self.round_price(symbol, params['stopPrice'])
+            order_params['stopPrice'] = self.round_price(symbol_clean, params['stopPrice'])
         elif order_type.upper() in ['STOP_MARKET', 'TAKE_PROFIT_MARKET', 'STOP', 'TAKE_PROFIT']:
             raise ValueError(f"stopPrice is required for {order_type} orders but was None")
 
@@ -528,13 +1035,24 @@ class BinanceClient:
             order_params['reduceOnly'] = 'true'
 
         logger.info(f"Creating order: {order_params}")
-        data = await self._request("POST", "/fapi/v1/order", order_params)
+        data = await self._request("POST", "/fapi/v1/order", order_params, is_order=True)
         logger.info(f"Order response: {data}")
 
-        # Invalidate cache after order creation
-        self.cache.invalidate()
+        # A resting order only changes the open-order lists (and a little margin, refreshed
+        # in the background); market orders and fills change balance and positions too
+        self.cache.invalidate_prefix('open_orders:')
+        if order_params['type'] == 'MARKET' or data.get('status') in ('FILLED', 'PARTIALLY_FILLED'):
+            self._invalidate_account()
+        else:
+            self._revalidate_account()
+        # Write through so reads don't miss the order before its stream event arrives. The
+        # ACK reply says NEW even for market orders, whose FILLED event often comes first
+        order_id = str(data.get('orderId'))
+        if (self._user_stream_live and data.get('status') not in CLOSED_ORDER_STATUSES
+                and order_id not in self._closed_order_ids):
+            self._orders_snapshot[order_id] = data
 
-        return {
+        result = {
             'id': str(data.get('orderId')),
             'symbol': data.get('symbol'),
             'type': data.get('type'),
@@ -543,22 +1061,25 @@ class BinanceClient:
             'price': float(data.get('price', 0)),
             'average': float(data.get('avgPrice', 0)),
             'status': data.get('status'),
-            'info': data
         }
+        if include_raw:
+            result['info'] = data
+        return result
 
     async def cancel_order(self, order_id: str, symbol: str) -> dict:
         """Cancels an order by ID."""
-        symbol_clean = symbol.replace("/", "")
+        symbol_clean = _clean_symbol(symbol)
 
         params = {
             "symbol": symbol_clean,
             "orderId": order_id
         }
 
-        data = await self._request("DELETE", "/fapi/v1/order", params)
+        data = await self._request("DELETE", "/fapi/v1/order", params, is_order=True)
 
-        # Invalidate cache after order cancellation
-        self.cache.invalidate()
+        # Cancelling changes the open-order lists only
+        self.cache.invalidate_prefix('open_orders:')
+        self._forget_order(str(data.get('orderId')))
 
         return {
             'id': str(data.get('orderId')),
@@ -569,7 +1090,7 @@ class BinanceClient:
 
     async def set_leverage(self, symbol: str, leverage: int):
         """Sets leverage for a symbol."""
-        symbol_clean = symbol.replace("/", "")
+        symbol_clean = _clean_symbol(symbol)
 
         params = {
             "symbol": symbol_clean,
@@ -577,14 +1098,14 @@ class BinanceClient:
         }
 
         try:
-            await self._request("POST", "/fapi/v1/leverage", params)
+            await self._request("POST", "/fapi/v1/leverage", params, is_order=True)
             logger.info(f"Leverage set to {leverage}x for {symbol}")
         except Exception as e:
             logger.warning(f"Could not set leverage for {symbol}: {e}")
 
     async def set_margin_mode(self, symbol: str, margin_mode: str) -> bool:
         """Sets margin mode for a symbol (ISOLATED or CROSSED)."""
-        symbol_clean = symbol.replace("/", "")
+        symbol_clean = _clean_symbol(symbol)
 
         params = {
             "symbol": symbol_clean,
@@ -614,9 +1135,10 @@ class BinanceClient:
     async def get_margin_mode(self, symbol: str) -> str:
         """Returns margin mode for a symbol (ISOLATED or CROSSED)."""
         try:
+            symbol_clean = _clean_symbol(symbol)
             positions = await self.fetch_positions()
             for p in positions:
-                if p.get('symbol') == symbol.replace("/", ""):
+                if p.get('symbol') == symbol_clean:
                     return p.get('marginMode', '').upper()
             return "ISOLATED"
         except Exception:
@@ -1,13 +1,19 @@
 import os
 import json
+import time
 import asyncio
 import logging
 from datetime import datetime
-from typing import Dict, List, Optional, Callable
-from collections import deque
+from typing import Dict, List, Optional, Callable, Union
+import numpy as np
 import pandas as pd
 import websockets
-from dotenv import load_dotenv
+from bot.core.config import load_env
+
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
 
 logger = logging.getLogger(__name__)
 
@@ -15,6 +21,58 @@ logger = logging.getLogger(__name__)
 TESTNET_WS_URL = "wss://stream.binancefuture.com/ws"
 MAINNET_WS_URL = "wss://fstream.binance.com/ws"
 
+CANDLE_COLUMNS = ['timestamp', 'open', 'high', 'low', 'close', 'volume']
+
+TIMEFRAME_UNITS = {'m': 60, 'h': 3600, 'd': 86400, 'w': 604800}
+
+
+def timeframe_seconds(timeframe: str) -> int:
+    """Convert a kline interval to seconds: 15m -> 900, 1h -> 3600."""
+    return int(timeframe[:-1]) * TIMEFRAME_UNITS[timeframe[-1]]
+
+
+class CandleRing:
+    """
+    Fixed-capacity ring of OHLCV candles stored field by field: one (6, capacity)
+    float64 array whose rows are timestamp, open, high, low, close, volume, so each
+    field is contiguous. The timestamp row holds the open time in epoch milliseconds
+    (exact in float64).
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.buf = np.empty((len(CANDLE_COLUMNS), capacity), dtype=np.float64)
+        self.head = 0  # total candles ever appended; next write goes to head % capacity
+        self.updated_at: Optional[float] = None  # epoch seconds of the last stream update
+        self.has_gap = False  # set on disconnect: bars may be missing until a REST reload
+
+    def __len__(self) -> int:
+        return min(self.head, self.capacity)
+
+    def last_timestamp(self) -> Optional[float]:
+        return self.buf[0, (self.head - 1) % self.capacity] if self.head else None
+
+    def append(self, row):
+        self.buf[:, self.head % self.capacity] = row
+        self.head += 1
+
+    def replace_last(self, row):
+        self.buf[:, (self.head - 1) % self.capacity] = row
+
+    def load(self, rows: np.ndarray):
+        """Replaces the contents with rows, a (n, 6) array oldest first, keeping the newest capacity."""
+        rows = rows[-self.capacity:]
+        self.buf[:, :len(rows)] = rows.T
+        self.head = len(rows)
+        self.has_gap = False
+
+    def ordered(self) -> np.ndarray:
+        """Returns a (6, n) copy of the candles, oldest first."""
+        if self.head <= self.capacity:
+            return self.buf[:, :self.head].copy()
+        start = self.head % self.capacity
+        return np.concatenate((self.buf[:, start:], self.buf[:, :start]), axis=1)
+
 
 class BinanceWebSocketClient:
     """
@@ -24,31 +82,39 @@ class BinanceWebSocketClient:
     - Subscribes to kline streams for multiple symbols
     - Maintains local candle cache (last N candles per symbol)
     - Auto-reconnection on disconnect
-    - Thread-safe candle access
+
+    Everything runs on one event loop and no cache read or write awaits midway, so
+    readers always see a ring between whole updates without any locking.
     """
 
     def __init__(self, max_candles: int = 500):
-        load_dotenv()
+        load_env()
         self.env_type = os.getenv("BINANCE_ENV", "testnet").lower()
         self.ws_url = TESTNET_WS_URL if self.env_type == "testnet" else MAINNET_WS_URL
 
         self.max_candles = max_candles
-        self._candle_cache: Dict[str, Dict[str, deque]] = {}  # {symbol: {timeframe: deque}}
+        self._candle_cache: Dict[str, Dict[str, CandleRing]] = {}  # {symbol: {timeframe: ring}}
         self._ws: Optional[websockets.WebSocketClientProtocol] = None
         self._running = False
+        self._connected = False
         self._subscribed_streams: List[str] = []
-        self._lock = asyncio.Lock()
+        self._clean_symbols: Dict[str, str] = {}  # BTC/USDT -> BTCUSDT, filled as symbols are seen
         self._callbacks: List[Callable] = []
         self._reconnect_delay = 5  # seconds
-        self._last_update: Dict[str, datetime] = {}
+        # Set by whichever append/preload brings every ring up to the count wait_for_data wants
+        self._data_ready = asyncio.Event()
+        self._ready_target: Optional[int] = None
 
     def _symbol_to_stream(self, symbol: str) -> str:
         """Convert symbol format: BTC/USDT -> btcusdt"""
         return symbol.replace("/", "").lower()
 
-    def _stream_to_symbol(self, stream_symbol: str) -> str:
-        """Convert stream format back: btcusdt -> BTCUSDT"""
-        return stream_symbol.upper()
+    def _clean_symbol(self, symbol: str) -> str:
+        """BTC/USDT -> BTCUSDT, from a table instead of a new string per call."""
+        clean = self._clean_symbols.get(symbol)
+        if clean is None:
+            clean = self._clean_symbols[symbol] = symbol.replace("/", "")
+        return clean
 
     async def initialize(self, symbols: List[str], timeframes: List[str] = ["1h"]):
         """
@@ -60,10 +126,10 @@ class BinanceWebSocketClient:
         """
         # Initialize candle cache for each symbol/timeframe
         for symbol in symbols:
-            symbol_clean = symbol.replace("/", "")
+            symbol_clean = self._clean_symbol(symbol)
             self._candle_cache[symbol_clean] = {}
             for tf in timeframes:
-                self._candle_cache[symbol_clean][tf] = deque(maxlen=self.max_candles)
+                self._candle_cache[symbol_clean][tf] = CandleRing(self.max_candles)
 
         # Build subscription streams
         self._subscribed_streams = []
@@ -87,6 +153,8 @@ class BinanceWebSocketClient:
                 logger.warning(f"WebSocket connection closed: {e}. Reconnecting in {self._reconnect_delay}s...")
             except Exception as e:
                 logger.error(f"WebSocket error: {e}. Reconnecting in {self._reconnect_delay}s...")
+            finally:
+                self._mark_disconnected()
 
             if self._running:
                 await asyncio.sleep(self._reconnect_delay)
@@ -99,13 +167,24 @@ class BinanceWebSocketClient:
 
         logger.info(f"Connecting to WebSocket: {self.ws_url}")
         self._ws = await websockets.connect(url, ping_interval=20, ping_timeout=10)
+        self._connected = True
         logger.info(f"WebSocket connected successfully in {self.env_type.upper()} mode")
 
+    def _mark_disconnected(self):
+        """Klines sent while the socket is down are never replayed, so every ring may now have a gap."""
+        if self._connected:
+            for rings in self._candle_cache.values():
+                for ring in rings.values():
+                    ring.has_gap = True
+        self._connected = False
+
     async def _message_loop(self):
         """Process incoming WebSocket messages."""
-        async for message in self._ws:
+        while True:
+            # Raw frame bytes go straight to the parser, skipping the str decode
+            message = await self._ws.recv(decode=False)
             try:
-                data = json.loads(message)
+                data = json_loads(message)
                 await self._process_message(data)
             except json.JSONDecodeError as e:
                 logger.warning(f"Failed to parse message: {e}")
@@ -118,46 +197,95 @@ class BinanceWebSocketClient:
             return
 
         kline = data['k']
-        symbol = self._stream_to_symbol(data['s'])
+        symbol = data['s']  # already upper-case BTCUSDT, the cache key
         timeframe = kline['i']
         is_closed = kline['x']  # Is this kline closed?
 
-        candle = {
-            'timestamp': pd.to_datetime(kline['t'], unit='ms'),
-            'open': float(kline['o']),
-            'high': float(kline['h']),
-            'low': float(kline['l']),
-            'close': float(kline['c']),
-            'volume': float(kline['v']),
-            'is_closed': is_closed
-        }
-
-        async with self._lock:
-            if symbol in self._candle_cache and timeframe in self._candle_cache[symbol]:
-                cache = self._candle_cache[symbol][timeframe]
+        open_time = kline['t']
+        row = (open_time, float(kline['o']), float(kline['h']), float(kline['l']),
+               float(kline['c']), float(kline['v']))
 
-                # Update or append candle
-                if len(cache) > 0 and cache[-1]['timestamp'] == candle['timestamp']:
-                    # Update existing candle (still forming)
-                    cache[-1] = candle
-                else:
-                    # New candle
-                    cache.append(candle)
+        rings = self._candle_cache.get(symbol)
+        cache = rings.get(timeframe) if rings else None
+        if cache is not None:
+            # Update or append candle
+            if cache.last_timestamp() == open_time:
+                # Update existing candle (still forming)
+                cache.replace_last(row)
+            else:
+                # New candle
+                cache.append(row)
+                self._check_data_ready()
 
-                self._last_update[f"{symbol}_{timeframe}"] = datetime.now()
+            cache.updated_at = time.time()
 
         # Trigger callbacks if candle closed
-        if is_closed:
+        if is_closed and self._callbacks:
+            candle = dict(zip(CANDLE_COLUMNS, row))
+            candle['timestamp'] = pd.to_datetime(open_time, unit='ms')
+            candle['is_closed'] = True
             for callback in self._callbacks:
                 try:
                     await callback(symbol, timeframe, candle)
                 except Exception as e:
                     logger.error(f"Callback error: {e}")
 
+    @property
+    def is_running(self) -> bool:
+        """True between start() and stop(), including while reconnecting."""
+        return self._running
+
+    @property
+    def is_connected(self) -> bool:
+        """True while the socket is open and streaming."""
+        return self._connected
+
+    def _ring(self, symbol: str, timeframe: str) -> Optional[CandleRing]:
+        rings = self._candle_cache.get(self._clean_symbol(symbol))
+        return rings.get(timeframe) if rings else None
+
+    def is_live(self, symbol: str, timeframe: str) -> bool:
+        """
+        True if the buffer for symbol/timeframe can be trusted as the latest series:
+        the socket is connected, no bars were missed since the last reload, and the
+        last update is no older than one candle interval.
+        """
+        ring = self._ring(symbol, timeframe)
+        if not self._connected or ring is None or ring.has_gap or ring.updated_at is None:
+            return False
+        return time.time() - ring.updated_at <= timeframe_seconds(timeframe)
+
+    def needs_backfill(self, symbol: str, timeframe: str) -> bool:
+        """True if the buffer may have lost bars during a disconnect."""
+        ring = self._ring(symbol, timeframe)
+        return ring is not None and ring.has_gap
+
     def on_candle_close(self, callback: Callable):
         """Register a callback for when a candle closes."""
         self._callbacks.append(callback)
 
+    async def get_candles_arrays(self, symbol: str, timeframe: str = "1h") -> Optional[Dict[str, np.ndarray]]:
+        """
+        Get cached candles as contiguous float64 arrays keyed by column name, oldest first.
+        'timestamp' is epoch milliseconds. The arrays are views of one snapshot copy, so
+        later stream updates don't change them. Returns None when there are no candles.
+        """
+        symbol_clean = self._clean_symbol(symbol)
+
+        if symbol_clean not in self._candle_cache:
+            logger.warning(f"No cache for {symbol_clean}")
+            return None
+
+        if timeframe not in self._candle_cache[symbol_clean]:
+            logger.warning(f"No cache for {symbol_clean} {timeframe}")
+            return None
+
+        cache = self._candle_cache[symbol_clean][timeframe]
+        if len(cache) == 0:
+            return None
+
+        return dict(zip(CANDLE_COLUMNS, cache.ordered()))
+
     async def get_candles(self, symbol: str, timeframe: str = "1h") -> pd.DataFrame:
         """
         Get cached candles as a DataFrame.
@@ -169,63 +297,40 @@ class BinanceWebSocketClient:
         Returns:
             DataFrame with columns: timestamp, open, high, low, close, volume
         """
-        symbol_clean = symbol.replace("/", "")
-
-        async with self._lock:
-            if symbol_clean not in self._candle_cache:
-                logger.warning(f"No cache for {symbol_clean}")
-                return pd.DataFrame()
-
-            if timeframe not in self._candle_cache[symbol_clean]:
-                logger.warning(f"No cache for {symbol_clean} {timeframe}")
-                return pd.DataFrame()
+        arrays = await self.get_candles_arrays(symbol, timeframe)
+        if arrays is None:
+            return pd.DataFrame()
 
-            cache = self._candle_cache[symbol_clean][timeframe]
-            if len(cache) == 0:
-                return pd.DataFrame()
-
-            df = pd.DataFrame(list(cache))
-            # Remove the is_closed column for strategy use
-            if 'is_closed' in df.columns:
-                df = df.drop(columns=['is_closed'])
-
-            return df
+        arrays['timestamp'] = pd.to_datetime(arrays['timestamp'].astype(np.int64), unit='ms')
+        return pd.DataFrame(arrays, copy=False)
 
     async def get_candle_count(self, symbol: str, timeframe: str = "1h") -> int:
         """Get number of cached candles for a symbol/timeframe."""
-        symbol_clean = symbol.replace("/", "")
+        symbol_clean = self._clean_symbol(symbol)
 
-        async with self._lock:
-            if symbol_clean in self._candle_cache and timeframe in self._candle_cache[symbol_clean]:
-                return len(self._candle_cache[symbol_clean][timeframe])
+        if symbol_clean in self._candle_cache and timeframe in self._candle_cache[symbol_clean]:
+            return len(self._candle_cache[symbol_clean][timeframe])
         return 0
 
-    async def preload_candles(self, symbol: str, timeframe: str, candles: List[dict]):
+    async def preload_candles(self, symbol: str, timeframe: str, candles: Union[pd.DataFrame, List[dict]]):
         """
         Preload historical candles into the cache (from REST API).
         Call this before starting WebSocket to have historical data.
         """
-        symbol_clean = symbol.replace("/", "")
-
-        async with self._lock:
-            if symbol_clean not in self._candle_cache:
-                self._candle_cache[symbol_clean] = {}
-            if timeframe not in self._candle_cache[symbol_clean]:
-                self._candle_cache[symbol_clean][timeframe] = deque(maxlen=self.max_candles)
-
-            cache = self._candle_cache[symbol_clean][timeframe]
-            cache.clear()
-
-            for candle in candles:
-                cache.append({
-                    'timestamp': candle['timestamp'] if isinstance(candle['timestamp'], pd.Timestamp) else pd.to_datetime(candle['timestamp']),
-                    'open': float(candle['open']),
-                    'high': float(candle['high']),
-                    'low': float(candle['low']),
-                    'close': float(candle['close']),
-                    'volume': float(candle['volume']),
-                    'is_closed': True
-                })
+        symbol_clean = self._clean_symbol(symbol)
+
+        frame = candles if isinstance(candles, pd.DataFrame) else pd.DataFrame(candles, columns=CANDLE_COLUMNS)
+        rows = np.empty((len(frame), len(CANDLE_COLUMNS)), dtype=np.float64)
+        rows[:, 0] = pd.DatetimeIndex(pd.to_datetime(frame['timestamp'])).as_unit('ms').asi8
+        rows[:, 1:] = frame[CANDLE_COLUMNS[1:]].to_numpy(dtype=np.float64)
+
+        if symbol_clean not in self._candle_cache:
+            self._candle_cache[symbol_clean] = {}
+        if timeframe not in self._candle_cache[symbol_clean]:
+            self._candle_cache[symbol_clean][timeframe] = CandleRing(self.max_candles)
+
+        self._candle_cache[symbol_clean][timeframe].load(rows)
+        self._check_data_ready()
 
         logger.info(f"Preloaded {len(candles)} candles for {symbol} {timeframe}")
 
@@ -240,39 +345,50 @@ class BinanceWebSocketClient:
         Returns:
             True if data is ready, False if timeout
         """
-        start = asyncio.get_event_loop().time()
-
-        while asyncio.get_event_loop().time() - start < timeout:
-            all_ready = True
-
-            async with self._lock:
-                for symbol, timeframes in self._candle_cache.items():
-                    for tf, cache in timeframes.items():
-                        if len(cache) < min_candles:
-                            all_ready = False
-                            break
-                    if not all_ready:
-                        break
-
-            if all_ready:
-                return True
-
-            await asyncio.sleep(1)
-
-        return False
+        if self._has_candles(min_candles):
+            return True
+
+        self._ready_target = min_candles
+        self._data_ready.clear()
+        try:
+            await asyncio.wait_for(self._data_ready.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            self._ready_target = None
+
+    def _has_candles(self, min_candles: int) -> bool:
+        """True if every symbol/timeframe holds at least min_candles."""
+        return all(
+            len(cache) >= min_candles
+            for timeframes in self._candle_cache.values()
+            for cache in timeframes.values()
+        )
+
+    def _check_data_ready(self):
+        """Wakes wait_for_data once the candle count it is waiting for is reached."""
+        if self._ready_target is not None and self._has_candles(self._ready_target):
+            self._data_ready.set()
 
     def get_status(self) -> dict:
         """Get WebSocket connection status."""
         return {
-            "connected": self._ws is not None and self._ws.open if self._ws else False,
+            "connected": self._connected,
             "running": self._running,
             "streams": len(self._subscribed_streams),
-            "last_updates": {k: v.isoformat() for k, v in self._last_update.items()}
+            "last_updates": {
+                f"{symbol}_{tf}": datetime.fromtimestamp(ring.updated_at).isoformat()
+                for symbol, rings in self._candle_cache.items()
+                for tf, ring in rings.items()
+                if ring.updated_at is not None
+            }
         }
 
     async def stop(self):
         """Stop the WebSocket connection."""
         self._running = False
+        self._connected = False
         if self._ws:
             await self._ws.close()
             logger.info("WebSocket connection closed")
@@ -108,7 +108,7 @@ class Executor:
         logger.info(f"EXECUTING [{symbol}] {side} Size: {size:.4f} @ {entry_price} SL: {stop_loss} TP: {take_profit}")
 
         try:
-            # Set Margin Mode and Leverage (idempotent)
+            # Set Margin Mode and Leverage (idempotent; no-ops for symbols warmed up at startup)
             await self._ensure_margin_mode(symbol)
             await self._ensure_leverage(symbol)
 
@@ -125,21 +125,23 @@ class Executor:
             filled_price = order.get('average') or entry_price
             order_id = order.get('id')
 
-            # Place SL/TP with retry
+            # Place SL/TP with retry; they are independent, so both go out at once
             sl_side = 'sell' if side == "BUY" else 'buy'
 
             logger.info(f"[{symbol}] Placing SL order: side={sl_side}, size={size}, stopPrice={stop_loss}")
-            sl_order = await self._execute_with_retry(
-                self.client.create_order,
-                symbol, 'STOP_MARKET', sl_side, size, None,
-                {'stopPrice': stop_loss, 'reduceOnly': True}
-            )
-
             logger.info(f"[{symbol}] Placing TP order: side={sl_side}, size={size}, stopPrice={take_profit}")
-            tp_order = await self._execute_with_retry(
-                self.client.create_order,
-                symbol, 'TAKE_PROFIT_MARKET', sl_side, size, None,
-                {'stopPrice': take_profit, 'reduceOnly': True}
+            # _execute_with_retry returns None instead of raising, so one failure can't cancel the other
+            sl_order, tp_order = await asyncio.gather(
+                self._execute_with_retry(
+                    self.client.create_order,
+                    symbol, 'STOP_MARKET', sl_side, size, None,
+                    {'stopPrice': stop_loss, 'reduceOnly': True}
+                ),
+                self._execute_with_retry(
+                    self.client.create_order,
+                    symbol, 'TAKE_PROFIT_MARKET', sl_side, size, None,
+                    {'stopPrice': take_profit, 'reduceOnly': True}
+                ),
             )
 
             # Verify protective orders were placed (reconciliation loop will auto-add if missing)
@@ -153,12 +155,13 @@ class Executor:
             else:
                 logger.info(f"[{symbol}] TP order placed successfully: {tp_order.get('id')}")
 
-            # DB Logging - include SL/TP prices for tracking
-            await db.execute(
+            # DB Logging - include SL/TP prices for tracking; queued so the order path doesn't wait on the commit
+            db.enqueue_write(
                 """INSERT INTO trades
                    (symbol, strategy, side, entry_price, size, regime_at_entry, entry_time, sl_price, tp_price)
                    VALUES (?, ?, ?, ?, ?, ?, datetime('now'), ?, ?)""",
-                (symbol, strategy, side, filled_price, size, regime, stop_loss, take_profit)
+                (symbol, strategy, side, filled_price, size, regime, stop_loss, take_profit),
+                on_error=lambda e: telegram_alerter.alert_error("Executor", f"{symbol}: trade not recorded: {e}")
             )
 
             # Send Telegram alert
@@ -177,12 +180,21 @@ class Executor:
         except Exception as e:
             logger.error(f"Execution Failed for {symbol}: {e}")
             await telegram_alerter.alert_error("Executor", f"{symbol}: {e}")
-            await db.execute(
+            db.enqueue_write(
                 "INSERT INTO system_errors (component, message) VALUES (?, ?)",
                 ("executor", f"[{symbol}] {e}")
             )
             return None
 
+    async def warmup(self, symbols: list):
+        """Sets margin mode and leverage for every symbol up front, all symbols concurrently."""
+        async def prepare(symbol):
+            await self._ensure_margin_mode(symbol)
+            await self._ensure_leverage(symbol)
+
+        await asyncio.gather(*(prepare(symbol) for symbol in symbols))
+        logger.info(f"Margin mode and leverage ready for {len(self.leverage_set_cache)} symbols")
+
     async def _ensure_margin_mode(self, symbol: str):
         """Sets margin mode (ISOLATED/CROSS) if not already cached."""
         if symbol not in self.margin_mode_cache:
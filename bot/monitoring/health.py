@@ -53,10 +53,9 @@ class HealthMonitor:
     async def send_heartbeat(self):
         """Sends a heartbeat with current system status and performance stats."""
         # Gather status information
-        balance = await binance_client.get_balance()
+        balance, positions, _ = await binance_client.refresh_state()
         equity = float(balance['total']['USDT'])
 
-        positions = await binance_client.fetch_positions()
         open_positions = len(positions)
 
         # Get daily PnL from snapshots
@@ -216,7 +216,7 @@ class PositionMonitor:
             # Fallback: get last price
             try:
                 ohlcv = await binance_client.fetch_ohlcv(symbol, '1m', limit=1)
-                exit_price = ohlcv[-1][4] if ohlcv else 0
+                exit_price = float(ohlcv[-1, 4]) if len(ohlcv) else 0
             except Exception:
                 exit_price = 0
 
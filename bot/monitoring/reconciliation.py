@@ -61,8 +61,7 @@ class ReconciliationLoop:
 
         # Fetch current state from exchange
         try:
-            positions = await binance_client.fetch_positions()
-            all_orders = await binance_client.fetch_open_orders()
+            _, positions, all_orders = await binance_client.refresh_state()
         except Exception as e:
             logger.error(f"Failed to fetch positions/orders for reconciliation: {e}")
             return
@@ -1,18 +1,29 @@
 import pandas as pd
 import numpy as np
 import logging
+from enum import StrEnum
 
 logger = logging.getLogger(__name__)
 
+
+class Regime(StrEnum):
+    """Market regimes. Members compare equal to their names, so DB rows and config stay plain strings."""
+    NO_TRADE = "NO_TRADE"
+    TREND_BULL = "TREND_BULL"
+    TREND_BEAR = "TREND_BEAR"
+    RANGE = "RANGE"
+    SQUEEZE = "SQUEEZE"
+
+
 class RegimeClassifier:
     def __init__(self, config: dict = None):
         self.config = config or {}
-        self.confirmed_regime = "NO_TRADE"
+        self.confirmed_regime = Regime.NO_TRADE
         self.pending_regime = None
         self.pending_count = 0
         self.min_duration = self.config.get("regime", {}).get("min_duration_bars", 3)
 
-    def _confirm_with_hysteresis(self, new_regime: str) -> str:
+    def _confirm_with_hysteresis(self, new_regime: Regime) -> Regime:
         # If same as confirmed, reset pending
         if new_regime == self.confirmed_regime:
             self.pending_regime = None
@@ -36,7 +47,7 @@ class RegimeClassifier:
 
     def detect_regime(self, df: pd.DataFrame, symbol: str) -> dict:
         if df.empty or len(df) < 50:
-            return {"symbol": symbol, "regime": "NO_TRADE", "reason": "Insufficient Data"}
+            return {"symbol": symbol, "regime": Regime.NO_TRADE, "reason": "Insufficient Data"}
 
         current = df.iloc[-1]
 
@@ -54,14 +65,13 @@ class RegimeClassifier:
         # Optional thresholds
         sep_min = float(self.config.get("regime", {}).get("ema_sep_min", 0.0))
 
-        proposed = "NO_TRADE"
+        proposed = Regime.NO_TRADE
         confidence = 0.0
         reason = ""
 
         # 1) TREND: ADX strong + direction meaningful
         if adx > adx_high and abs(ema_sep) > sep_min:
-            direction = "BULL" if ema_sep > 0 else "BEAR"
-            proposed = f"TREND_{direction}"
+            proposed = Regime.TREND_BULL if ema_sep > 0 else Regime.TREND_BEAR
 
             # Confidence: distance above adx_high normalized by recent ADX range
             adx_min = float(recent["ADX_14"].min())
@@ -72,7 +82,7 @@ class RegimeClassifier:
 
         # 2) SQUEEZE: volatility compression (can be range, but usually breakout-ready)
         elif bb_width < bw_low:
-            proposed = "SQUEEZE"
+            proposed = Regime.SQUEEZE
             bw_med = float(recent["BB_WIDTH"].median())
             denom = max(1e-9, bw_med)
             confidence = (bw_low - bb_width) / denom
@@ -80,14 +90,14 @@ class RegimeClassifier:
 
         # 3) RANGE: ADX weak (mean-reversion opportunity), even if BB width not squeezed
         elif adx < adx_low:
-            proposed = "RANGE"
+            proposed = Regime.RANGE
             denom = max(1e-9, adx_low)
             confidence = (adx_low - adx) / denom
             reason = "ADX weak (non-trending)"
 
         # 4) Otherwise: transition / messy -> NO_TRADE
         else:
-            proposed = "NO_TRADE"
+            proposed = Regime.NO_TRADE
             confidence = 0.0
             reason = "Transition zone"
 
@@ -105,7 +115,7 @@ class RegimeClassifier:
                 "adx_threshold_high": adx_high,
                 "adx_threshold_low": adx_low,
                 "bw_threshold_low": bw_low,
-                "pending_regime": self.pending_regime,
+                "pending_regime": str(self.pending_regime) if self.pending_regime else None,
                 "pending_count": self.pending_count,
                 "min_duration_bars": self.min_duration,
             },
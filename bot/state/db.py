@@ -1,11 +1,33 @@
 import aiosqlite
+import asyncio
 import logging
 import os
+import sqlite3
+from contextlib import asynccontextmanager
+from typing import Awaitable, Callable
 
 logger = logging.getLogger(__name__)
 
 DB_PATH = "bot_data.db"
 
+# Extra read-only connections; WAL lets them read while the main connection writes
+READ_POOL_SIZE = 4
+
+# PRAGMA optimize needs SQLite 3.18+
+SUPPORTS_OPTIMIZE = sqlite3.sqlite_version_info >= (3, 18, 0)
+OPTIMIZE_INTERVAL_HOURS = 6
+
+# Queued writes are committed together: up to this many statements, gathered over this long
+WRITE_BATCH_MAX = 100
+WRITE_BATCH_DELAY = 0.05  # seconds
+
+CONNECTION_PRAGMAS = """
+PRAGMA journal_mode = WAL;
+PRAGMA synchronous = NORMAL;
+PRAGMA temp_store = MEMORY;
+PRAGMA mmap_size = 268435456;
+"""
+
 INIT_SCRIPT = """
 -- Regimes Table: Tracks market regime changes
 CREATE TABLE IF NOT EXISTS regimes (
@@ -91,20 +113,71 @@ CREATE TABLE IF NOT EXISTS system_events (
 CREATE INDEX IF NOT EXISTS idx_equity_date ON equity_snapshots(snapshot_date);
 
 -- Index for trade queries
-CREATE INDEX IF NOT EXISTS idx_trades_symbol ON trades(symbol);
+DROP INDEX IF EXISTS idx_trades_symbol;
+CREATE INDEX IF NOT EXISTS idx_trades_symbol_entry_time ON trades(symbol, entry_time DESC);
 CREATE INDEX IF NOT EXISTS idx_trades_exit_reason ON trades(exit_reason);
+CREATE INDEX IF NOT EXISTS idx_trades_entry_time ON trades(entry_time DESC);
+
+-- Index for latest-regime-per-symbol lookups
+CREATE INDEX IF NOT EXISTS idx_regimes_symbol_created ON regimes(symbol, created_at DESC);
 """
 
 class Database:
-    def __init__(self, db_path: str = DB_PATH):
+    def __init__(self, db_path: str = DB_PATH, read_pool_size: int = READ_POOL_SIZE):
         self.db_path = db_path
+        self.read_pool_size = read_pool_size if db_path != ":memory:" else 0
         self.conn = None
+        self._readers: asyncio.Queue = None
+        self._writes: asyncio.Queue = None
+        self._writer: asyncio.Task = None
+        # Held around every write on the main connection so no one commits half of another's transaction
+        self._write_lock = asyncio.Lock()
+
+    async def _open_connection(self) -> aiosqlite.Connection:
+        conn = await aiosqlite.connect(self.db_path)
+        conn.row_factory = aiosqlite.Row
+        await conn.executescript(CONNECTION_PRAGMAS)
+        return conn
 
     async def connect(self):
-        self.conn = await aiosqlite.connect(self.db_path)
-        self.conn.row_factory = aiosqlite.Row
+        if self.conn:
+            return
+        self.conn = await self._open_connection()
         await self._init_schema()
-        logger.info(f"Connected to SQLite DB at {self.db_path}")
+
+        if self.read_pool_size:
+            self._readers = asyncio.Queue()
+            for _ in range(self.read_pool_size):
+                self._readers.put_nowait(await self._open_connection())
+        logger.info(f"Connected to SQLite DB at {self.db_path} ({self.read_pool_size} readers)")
+
+    @asynccontextmanager
+    async def _reader(self):
+        """
+        Borrows a pooled read connection, or the main one when there is no pool.
+        A pooled connection is pinged with SELECT 1 first and reopened if it has gone bad.
+        """
+        if self._readers is None:
+            yield self.conn
+            return
+        conn = await self._readers.get()
+        try:
+            await conn.execute("SELECT 1")
+        except Exception as e:
+            logger.warning(f"Reopening stale read connection: {e}")
+            try:
+                await conn.close()
+            except Exception:
+                pass
+            try:
+                conn = await self._open_connection()
+            except Exception:
+                self._readers.put_nowait(conn)
+                raise
+        try:
+            yield conn
+        finally:
+            self._readers.put_nowait(conn)
 
     async def _init_schema(self):
         if not self.conn:
@@ -112,23 +185,153 @@ class Database:
         await self.conn.executescript(INIT_SCRIPT)
         await self.conn.commit()
 
+        # Gather planner statistics once so the composite indexes get picked
+        async with self.conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'sqlite_stat1'"
+        ) as cursor:
+            stats = await cursor.fetchone()
+        if not stats:
+            await self.conn.execute("PRAGMA analysis_limit = 400")
+            await self.conn.execute("ANALYZE")
+            await self.conn.commit()
+
+    async def optimize(self):
+        """Refreshes planner statistics for tables whose query plans would benefit."""
+        if not self.conn or not SUPPORTS_OPTIMIZE:
+            return
+        try:
+            await self.conn.execute("PRAGMA optimize")
+        except Exception as e:
+            logger.warning(f"PRAGMA optimize failed: {e}")
+
+    async def optimize_loop(self, interval_hours: float = OPTIMIZE_INTERVAL_HOURS):
+        """Runs PRAGMA optimize periodically for long-running processes."""
+        while True:
+            await asyncio.sleep(interval_hours * 3600)
+            await self.optimize()
+
     async def close(self):
+        await self.flush_writes()
         if self.conn:
+            await self.optimize()
             await self.conn.close()
+            self.conn = None
+            if self._readers is not None:
+                while not self._readers.empty():
+                    await self._readers.get_nowait().close()
+                self._readers = None
             logger.info("Database connection closed")
 
     async def execute(self, query: str, params: tuple = ()):
-        async with self.conn.execute(query, params) as cursor:
+        async with self._write_lock:
+            async with self.conn.execute(query, params) as cursor:
+                await self.conn.commit()
+                return cursor.lastrowid
+
+    def enqueue_write(self, query: str, params: tuple = (), on_error: Callable[[Exception], Awaitable] = None):
+        """
+        Queues a write for the background writer, which commits queued writes in batches.
+        If the statement fails, on_error is awaited with the exception.
+        """
+        if self._writes is None:
+            self._writes = asyncio.Queue()
+        self._writes.put_nowait((query, params, on_error))
+        if self._writer is None or self._writer.done():
+            self._writer = asyncio.create_task(self._write_loop())
+
+    async def flush_writes(self):
+        """Commits everything queued so far and stops the background writer."""
+        if self._writer is not None and not self._writer.done():
+            self._writes.put_nowait(None)
+            try:
+                await self._writer
+            except Exception as e:
+                logger.error(f"DB writer task failed: {e}")
+        self._writer = None
+
+        # Anything the writer never got to, e.g. because it had already exited
+        pending = []
+        while self._writes is not None and not self._writes.empty():
+            item = self._writes.get_nowait()
+            if item is not None:
+                pending.append(item)
+        for i in range(0, len(pending), WRITE_BATCH_MAX):
+            await self._write_batch(pending[i:i + WRITE_BATCH_MAX])
+
+    async def _write_loop(self):
+        while True:
+            item = await self._writes.get()
+            if item is None:
+                return
+            batch = [item]
+            await asyncio.sleep(WRITE_BATCH_DELAY)
+
+            stop = False
+            while len(batch) < WRITE_BATCH_MAX and not self._writes.empty():
+                item = self._writes.get_nowait()
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+
+            await self._write_batch(batch)
+            if stop:
+                return
+
+    async def _write_batch(self, batch: list):
+        """
+        Runs a batch of queued statements in one BEGIN...COMMIT transaction. If any of
+        them fails the batch is rolled back and replayed one statement per transaction,
+        so only the failing statements are lost; each failure goes to its on_error.
+        """
+        failures = []
+        async with self._write_lock:
+            try:
+                await self.conn.execute("BEGIN")
+                for query, params, _ in batch:
+                    await self.conn.execute(query, params)
+                await self.conn.commit()
+            except Exception as e:
+                logger.warning(f"Batch of {len(batch)} queued DB writes failed, retrying one by one: {e}")
+                await self._rollback()
+                for item in batch:
+                    query, params, _ = item
+                    try:
+                        await self.conn.execute(query, params)
+                        await self.conn.commit()
+                    except Exception as write_error:
+                        await self._rollback()
+                        failures.append((item, write_error))
+
+        for (query, params, on_error), e in failures:
+            logger.error(f"Queued DB write failed: {e}")
+            if on_error is not None:
+                try:
+                    await on_error(e)
+                except Exception as report_error:
+                    logger.error(f"Reporting a failed DB write failed: {report_error}")
+
+    async def _rollback(self):
+        try:
+            await self.conn.rollback()
+        except Exception as e:
+            logger.error(f"Rollback failed: {e}")
+
+    async def executemany(self, query: str, rows: list):
+        """Runs one statement for many parameter rows in a single transaction."""
+        async with self._write_lock:
+            await self.conn.executemany(query, rows)
             await self.conn.commit()
-            return cursor.lastrowid
 
     async def fetch_all(self, query: str, params: tuple = ()):
-        async with self.conn.execute(query, params) as cursor:
-            return await cursor.fetchall()
-    
+        async with self._reader() as conn:
+            async with conn.execute(query, params) as cursor:
+                return await cursor.fetchall()
+
     async def fetch_one(self, query: str, params: tuple = ()):
-        async with self.conn.execute(query, params) as cursor:
-            return await cursor.fetchone()
+        async with self._reader() as conn:
+            async with conn.execute(query, params) as cursor:
+                return await cursor.fetchone()
 
     async def save_equity_snapshot(self, balance: float, equity: float, unrealized_pnl: float = 0):
         """Saves equity snapshot. Updates if one exists for today, otherwise inserts."""
@@ -169,6 +372,27 @@ class Database:
         )
         return result['peak'] if result and result['peak'] else None
 
+    async def save_positions_snapshot(self, positions: list):
+        """Replaces the positions snapshot table with the given exchange positions."""
+        rows = [
+            (p['symbol'], p['side'].upper(), p['contracts'], p['entryPrice'], p['markPrice'], p['unrealizedPnl'])
+            for p in positions
+        ]
+        async with self._write_lock:
+            await self.conn.execute("DELETE FROM positions")
+            await self.conn.executemany(
+                "INSERT INTO positions (symbol, side, size, entry_price, mark_price, unrealized_pnl) VALUES (?, ?, ?, ?, ?, ?)",
+                rows
+            )
+            await self.conn.commit()
+
+    async def get_positions_snapshot(self) -> list:
+        """Gets the last positions snapshot written by the engine."""
+        rows = await self.fetch_all(
+            "SELECT symbol, side, size, entry_price, mark_price, unrealized_pnl, updated_at FROM positions"
+        )
+        return [dict(r) for r in rows]
+
     async def log_system_event(self, event_type: str, reason: str = None):
         """Logs a system event (KILL_SWITCH, PAUSE, RESUME, START, STOP)."""
         await self.execute(
@@ -246,16 +470,30 @@ class Database:
             'avg_loss': round(avg_loss['avg'] if avg_loss else 0, 2),
         }
 
-    async def get_trade_history(self, limit: int = 50) -> list:
-        """Gets recent trade history with all details."""
-        trades = await self.fetch_all(
-            """SELECT id, symbol, strategy, side, entry_price, exit_price, size,
-                      pnl, fee, entry_time, exit_time, exit_reason, sl_price, tp_price
-               FROM trades
-               ORDER BY entry_time DESC
-               LIMIT ?""",
-            (limit,)
-        )
+    async def get_trade_history(self, limit: int = 50, before: str = None, before_id: int = None) -> list:
+        """
+        Gets recent trade history with all details.
+        Pass the (entry_time, id) of the last row seen as before/before_id to get the next page.
+        """
+        if before is None:
+            trades = await self.fetch_all(
+                """SELECT id, symbol, strategy, side, entry_price, exit_price, size,
+                          pnl, fee, entry_time, exit_time, exit_reason, sl_price, tp_price
+                   FROM trades
+                   ORDER BY entry_time DESC, id DESC
+                   LIMIT ?""",
+                (limit,)
+            )
+        else:
+            trades = await self.fetch_all(
+                """SELECT id, symbol, strategy, side, entry_price, exit_price, size,
+                          pnl, fee, entry_time, exit_time, exit_reason, sl_price, tp_price
+                   FROM trades
+                   WHERE (entry_time, id) < (?, ?)
+                   ORDER BY entry_time DESC, id DESC
+                   LIMIT ?""",
+                (before, before_id if before_id is not None else 2**63 - 1, limit)
+            )
         return [dict(t) for t in trades] if trades else []
 
     async def get_daily_stats(self) -> dict:
@@ -3,11 +3,9 @@ import signal
 import sys
 import os
 import uvicorn
-from dotenv import load_dotenv
-
 from bot.core.logging_config import setup_logging, log_bot_start, log_bot_stop
-from bot.core.config import load_config
-from bot.core.engine import trading_engine
+from bot.core.config import load_config, load_env
+from bot.core.engine import get_engine
 from bot.api.dashboard_api import app
 from bot.exchange.binance_client import binance_client
 from bot.state.db import db
@@ -108,6 +106,7 @@ async def graceful_shutdown(reason: str = "User requested"):
 
     # Close connections
     await binance_client.close()
+    await telegram_alerter.aclose()
     await db.close()
 
     logger.info(f"Graceful shutdown complete. Closed {positions_closed} positions.")
@@ -160,9 +159,12 @@ def print_config(config: dict, env_type: str):
 async def main():
     global reconciliation_loop, health_monitor, position_monitor
 
-    load_dotenv()
+    load_env()
     config = load_config("config.yaml")
 
+    # Build the engine up front; it applies the risk config to the shared executor
+    trading_engine = get_engine()
+
     # Log startup
     env_type = os.getenv("BINANCE_ENV", "testnet")
     log_bot_start()
@@ -207,6 +209,10 @@ async def main():
         asyncio.create_task(reconciliation_loop.start(), name="reconciliation"),
         asyncio.create_task(health_monitor.start(), name="health"),
         asyncio.create_task(position_monitor.start(), name="position_monitor"),
+        asyncio.create_task(db.optimize_loop(), name="db_optimize"),
+        asyncio.create_task(binance_client.start_user_stream(), name="user_stream"),
+        asyncio.create_task(binance_client.time_sync_loop(), name="time_sync"),
+        asyncio.create_task(binance_client.exchange_info_refresh_loop(), name="exchange_info_refresh"),
     ]
 
     # Wait for shutdown signal
@@ -232,6 +238,14 @@ if __name__ == "__main__":
     signal.signal(signal.SIGINT, signal_handler)
     signal.signal(signal.SIGTERM, signal_handler)
 
+    # libuv event loop for the bot and the embedded dashboard server
+    if sys.platform != "win32":
+        try:
+            import uvloop
+            uvloop.install()
+        except ImportError:
+            pass
+
     try:
         asyncio.run(main())
     except KeyboardInterrupt:
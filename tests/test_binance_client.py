@@ -0,0 +1,221 @@
+import asyncio
+import httpx
+from bot.exchange.binance_client import BinanceClient
+
+
+def account_payload(wallet):
+    return {
+        'totalUnrealizedProfit': '0',
+        'assets': [{'asset': 'USDT', 'walletBalance': str(wallet), 'availableBalance': str(wallet)}],
+        'positions': [],
+    }
+
+
+def make_client(handler) -> BinanceClient:
+    client = BinanceClient()
+    client._exchange_info_loaded = True
+    client.client = httpx.AsyncClient(base_url=client.base_url, transport=httpx.MockTransport(handler))
+    return client
+
+
+def test_account_fetch_started_before_invalidation_is_not_cached():
+    async def run():
+        wallets = iter([100, 50])
+        first_sent = asyncio.Event()
+        release_first = asyncio.Event()
+
+        async def handler(request):
+            wallet = next(wallets)
+            if wallet == 100:
+                first_sent.set()
+                # Pre-order payload, answered only after the order went through
+                await release_first.wait()
+            return httpx.Response(200, json=account_payload(wallet))
+
+        client = make_client(handler)
+        stale = asyncio.create_task(client.get_balance(use_cache=False))
+        await first_sent.wait()
+
+        client._invalidate_account()
+        release_first.set()
+        assert (await stale)['total']['USDT'] == 100
+
+        # The old result answered its own caller but must not be served afterwards
+        assert client.cache.get('balance') is None
+        assert client.cache.get('account_data') is None
+        assert (await client.get_balance())['total']['USDT'] == 50
+
+    asyncio.run(run())
+
+
+def test_background_refresh_reruns_after_invalidation():
+    async def run():
+        wallets = iter([100, 50])
+        first_sent = asyncio.Event()
+        release_first = asyncio.Event()
+
+        async def handler(request):
+            wallet = next(wallets)
+            if wallet == 100:
+                first_sent.set()
+                await release_first.wait()
+            return httpx.Response(200, json=account_payload(wallet))
+
+        client = make_client(handler)
+        client._refresh_account_in_background()
+        await first_sent.wait()
+
+        # An order lands while the refresh is in flight
+        client._revalidate_account()
+        release_first.set()
+        await client._account_refresh
+
+        assert client.cache.get('balance')['total']['USDT'] == 50
+
+    asyncio.run(run())
+
+
+def order_event(order_id, status, execution='NEW', symbol='BTCUSDT', order_type='MARKET'):
+    return {
+        'e': 'ORDER_TRADE_UPDATE',
+        'o': {
+            'i': order_id, 's': symbol, 'o': order_type, 'ot': order_type, 'S': 'BUY',
+            'p': '0', 'q': '0.010', 'sp': '0', 'R': False, 'X': status, 'x': execution,
+        },
+    }
+
+
+def order_ack(order_id, order_type='MARKET'):
+    # Futures' default ACK reply: status NEW even for a market order that already filled
+    return {
+        'orderId': order_id, 'symbol': 'BTCUSDT', 'status': 'NEW', 'type': order_type, 'side': 'BUY',
+        'price': '0', 'origQty': '0.010', 'stopPrice': '0', 'avgPrice': '0', 'reduceOnly': False,
+    }
+
+
+def stream_client(on_order=None) -> BinanceClient:
+    def handler(request):
+        if request.url.path == '/fapi/v1/order' and request.method == 'POST':
+            order_id = 42
+            if on_order:
+                on_order(order_id)
+            return httpx.Response(200, json=order_ack(order_id))
+        if request.url.path == '/fapi/v2/account':
+            return httpx.Response(200, json=account_payload(100))
+        return httpx.Response(200, json=[])
+
+    client = make_client(handler)
+    client._user_stream_live = True
+    return client
+
+
+def test_fill_event_before_rest_reply_leaves_no_phantom_order():
+    async def run():
+        # The stream's FILLED update is applied while the REST reply is still in transit
+        client = stream_client(on_order=lambda oid: client._apply_user_event(order_event(oid, 'FILLED', 'TRADE')))
+        await client.create_order('BTC/USDT', 'market', 'buy', 0.01)
+        assert await client.fetch_open_orders() == []
+
+    asyncio.run(run())
+
+
+def test_fill_event_after_rest_reply_removes_written_through_order():
+    async def run():
+        client = stream_client()
+        await client.create_order('BTC/USDT', 'market', 'buy', 0.01)
+        assert [o['id'] for o in await client.fetch_open_orders()] == ['42']
+
+        client._apply_user_event(order_event(42, 'FILLED', 'TRADE'))
+        assert await client.fetch_open_orders() == []
+
+    asyncio.run(run())
+
+
+def test_seeded_snapshot_serves_open_orders_while_stream_is_live():
+    async def run():
+        seeded = [
+            dict(order_ack(1, 'STOP_MARKET'), stopPrice='49000', reduceOnly=True),
+            dict(order_ack(2, 'LIMIT'), symbol='ETHUSDT', price='2500'),
+        ]
+        requests = []
+
+        def handler(request):
+            requests.append(request.url.path)
+            return httpx.Response(200, json=seeded)
+
+        client = make_client(handler)
+        await client._seed_orders_snapshot()
+        client._user_stream_live = True
+        requests.clear()
+
+        btc = await client.fetch_open_orders('BTC/USDT', include_raw=True)
+        assert [o['id'] for o in btc] == ['1']
+        assert btc[0]['stopPrice'] == 49000.0 and btc[0]['reduceOnly'] is True
+        assert btc[0]['info'] is client._orders_snapshot['1']
+        assert sorted(o['id'] for o in await client.fetch_open_orders()) == ['1', '2']
+        assert requests == []  # served from memory, no REST call
+
+    asyncio.run(run())
+
+
+def test_order_updates_track_open_orders():
+    client = BinanceClient()
+    client._user_stream_live = True
+
+    client._apply_user_event(order_event(7, 'NEW', order_type='LIMIT'))
+    assert client._orders_snapshot['7']['status'] == 'NEW'
+    assert client._orders_snapshot['7']['type'] == 'LIMIT'
+
+    client._apply_user_event(order_event(7, 'PARTIALLY_FILLED', 'TRADE', order_type='LIMIT'))
+    assert client._orders_snapshot['7']['status'] == 'PARTIALLY_FILLED'
+
+    client._apply_user_event(order_event(7, 'CANCELED', 'CANCELED', order_type='LIMIT'))
+    assert '7' not in client._orders_snapshot
+
+    # A late update for an order that already closed doesn't bring it back
+    client._apply_user_event(order_event(7, 'NEW', order_type='LIMIT'))
+    assert '7' not in client._orders_snapshot
+
+
+def test_trades_and_account_updates_invalidate_account_state():
+    client = BinanceClient()
+
+    def prime():
+        client.cache.set('balance', {'total': {'USDT': 1.0}})
+        client._account_snapshot = ({'assets': []}, 1e12)
+
+    prime()
+    generation = client._account_generation
+    client._apply_user_event(order_event(8, 'NEW', order_type='LIMIT'))
+    assert client.cache.get('balance') is not None  # a resting order doesn't touch the account
+    assert client._account_generation == generation
+
+    client._apply_user_event(order_event(8, 'FILLED', 'TRADE', order_type='LIMIT'))
+    assert client.cache.get('balance') is None
+    assert client._account_snapshot == (None, 0.0)
+    assert client._account_generation > generation
+
+    prime()
+    generation = client._account_generation
+    client._apply_user_event({'e': 'ACCOUNT_UPDATE', 'a': {'m': 'ORDER', 'B': [], 'P': []}})
+    assert client.cache.get('balance') is None
+    assert client._account_generation > generation
+
+
+def test_cancel_removes_order_from_snapshot():
+    async def run():
+        def handler(request):
+            return httpx.Response(200, json={'orderId': 9, 'symbol': 'BTCUSDT', 'status': 'CANCELED'})
+
+        client = make_client(handler)
+        client._user_stream_live = True
+        client._apply_user_event(order_event(9, 'NEW', order_type='LIMIT'))
+
+        await client.cancel_order('9', 'BTC/USDT')
+        assert await client.fetch_open_orders() == []
+
+        # The stream's CANCELED update arriving afterwards is harmless
+        client._apply_user_event(order_event(9, 'CANCELED', 'CANCELED', order_type='LIMIT'))
+        assert await client.fetch_open_orders() == []
+
+    asyncio.run(run())
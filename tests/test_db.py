@@ -0,0 +1,76 @@
+import asyncio
+from bot.state.db import Database
+
+
+def test_connect_twice_keeps_one_pool(tmp_path):
+    async def run():
+        db = Database(str(tmp_path / "bot.db"), read_pool_size=2)
+        await db.connect()
+        conn, readers = db.conn, db._readers
+        await db.connect()
+        assert db.conn is conn and db._readers is readers
+        assert readers.qsize() == 2
+        await db.close()
+
+    asyncio.run(run())
+
+
+def test_stale_reader_is_replaced_on_acquire(tmp_path):
+    async def run():
+        db = Database(str(tmp_path / "bot.db"), read_pool_size=1)
+        await db.connect()
+        await db.execute("INSERT INTO system_events (event_type) VALUES (?)", ("START",))
+
+        stale = db._readers.get_nowait()
+        await stale.close()
+        db._readers.put_nowait(stale)
+
+        row = await db.fetch_one("SELECT event_type FROM system_events")
+        assert row['event_type'] == "START"
+        assert db._readers.qsize() == 1
+        fresh = db._readers.get_nowait()
+        assert fresh is not stale
+        db._readers.put_nowait(fresh)
+        await db.close()
+
+    asyncio.run(run())
+
+
+def test_failing_queued_write_is_reported_and_the_rest_committed(tmp_path):
+    async def run():
+        db = Database(str(tmp_path / "bot.db"), read_pool_size=0)
+        await db.connect()
+        errors = []
+
+        async def on_error(e):
+            errors.append(e)
+
+        db.enqueue_write("INSERT INTO system_events (event_type) VALUES (?)", ("A",))
+        db.enqueue_write("INSERT INTO system_events (event_type) VALUES (?)", (None,), on_error=on_error)
+        db.enqueue_write("INSERT INTO system_events (event_type) VALUES (?)", ("B",))
+        await db.flush_writes()
+
+        rows = await db.fetch_all("SELECT event_type FROM system_events ORDER BY id")
+        assert [r['event_type'] for r in rows] == ["A", "B"]
+        assert len(errors) == 1 and "NOT NULL" in str(errors[0])
+        await db.close()
+
+    asyncio.run(run())
+
+
+def test_flush_drains_writes_left_behind_by_an_exited_writer(tmp_path):
+    async def run():
+        db = Database(str(tmp_path / "bot.db"), read_pool_size=0)
+        await db.connect()
+
+        db.enqueue_write("INSERT INTO system_events (event_type) VALUES (?)", ("A",))
+        db._writer.cancel()
+        await asyncio.sleep(0)
+        db._writes.put_nowait(("INSERT INTO system_events (event_type) VALUES (?)", ("B",), None))
+        await db.flush_writes()
+
+        rows = await db.fetch_all("SELECT event_type FROM system_events ORDER BY id")
+        assert [r['event_type'] for r in rows] == ["A", "B"]
+        await db.close()
+
+    asyncio.run(run())
@@ -0,0 +1,130 @@
+import numpy as np
+import pandas as pd
+from bot.data.indicators import Indicators, OUTPUT_COLS
+from bot.regime.regime_classifier import regime_classifier
+
+
+def flat_frame(length=60, price=100.0):
+    return pd.DataFrame({
+        'timestamp': pd.date_range('2024-01-01', periods=length, freq='1h'),
+        'open': price,
+        'high': price,
+        'low': price,
+        'close': price,
+        'volume': 1.0,
+    })
+
+
+def test_flat_bars_give_nan_not_errors():
+    # Halted/illiquid symbols: zero ranges and zero moves make RSI/ADX 0/0
+    df = Indicators.add_all(flat_frame())
+
+    for col in OUTPUT_COLS:
+        assert col in df.columns
+    last = df.iloc[-1]
+    assert np.isnan(last['RSI_14'])
+    assert np.isnan(last['ADX_14'])
+    assert last['ATR_14'] == 0.0
+    assert last['EMA_20'] == 100.0
+    assert last['BB_WIDTH'] == 0.0
+
+    regime = regime_classifier.detect_regime(df, "FLAT/USDT")
+    assert regime['symbol'] == "FLAT/USDT"
+
+
+def random_frame(length=300, seed=7):
+    rng = np.random.default_rng(seed)
+    close = 50000 + np.cumsum(rng.normal(0, 100, length))
+    return pd.DataFrame({
+        'timestamp': pd.date_range('2024-01-01', periods=length, freq='1h'),
+        'open': close + rng.normal(0, 20, length),
+        'high': close + np.abs(rng.normal(50, 20, length)),
+        'low': close - np.abs(rng.normal(50, 20, length)),
+        'close': close,
+        'volume': rng.integers(100, 1000, length).astype(float),
+    })
+
+
+def reference_indicators(df):
+    """pandas_ta's definitions written with plain ewm/rolling."""
+    def rma(x, n):
+        return x.ewm(alpha=1 / n, min_periods=n).mean()
+
+    def ema(c, n):
+        seeded = c.copy()
+        seeded.iloc[:n - 1] = np.nan
+        seeded.iloc[n - 1] = c.iloc[:n].mean()
+        return seeded.ewm(span=n, adjust=False).mean()
+
+    high, low, close = df['high'], df['low'], df['close']
+    prev_close = close.shift(1)
+    tr = pd.concat([high - low, (high - prev_close).abs(), (prev_close - low).abs()], axis=1).max(axis=1)
+    tr.iloc[0] = np.nan
+
+    diff = close.diff()
+    avg_gain = rma(diff.clip(lower=0), 14)
+    avg_loss = rma(diff.clip(upper=0), 14).abs()
+
+    up = high - high.shift(1)
+    down = low.shift(1) - low
+    plus_dm = ((up > down) & (up > 0)) * up
+    minus_dm = ((down > up) & (down > 0)) * down
+    plus_dm.iloc[0] = minus_dm.iloc[0] = np.nan
+    k = 100 / rma(tr, 14)
+    dmp = k * rma(plus_dm, 14)
+    dmn = k * rma(minus_dm, 14)
+
+    mid = close.rolling(20).mean()
+    std = close.rolling(20).std(ddof=0)
+    return {
+        'ATR_14': rma(tr, 14),
+        'RSI_14': 100 * avg_gain / (avg_gain + avg_loss),
+        'ADX_14': rma(100 * (dmp - dmn).abs() / (dmp + dmn), 14),
+        'EMA_20': ema(close, 20),
+        'EMA_50': ema(close, 50),
+        'BBU_20_2.0': mid + 2 * std,
+        'BBM_20_2.0': mid,
+        'BBL_20_2.0': mid - 2 * std,
+    }
+
+
+def test_kernels_match_reference_formulas():
+    df = random_frame()
+    expected = reference_indicators(df)
+    Indicators.add_all(df)
+
+    for col, ref in expected.items():
+        np.testing.assert_allclose(df[col].to_numpy(), ref.to_numpy(), rtol=1e-9, err_msg=col)
+
+
+def test_update_matches_batch_on_growing_frame():
+    full = random_frame()
+    inds = Indicators()
+
+    for n in range(100, 130):
+        # Last row is the forming candle; nudge it so it differs from its closed version
+        window = full.iloc[:n].copy()
+        window.loc[n - 1, 'close'] += 5.0
+        window.loc[n - 1, 'high'] = max(window.loc[n - 1, 'high'], window.loc[n - 1, 'close'])
+
+        got = inds.update("BTC/USDT", window.copy())
+        want = Indicators.add_all(window.copy())
+        for col in OUTPUT_COLS + ('EMA_SEP', 'BB_WIDTH'):
+            np.testing.assert_allclose(got[col].to_numpy(), want[col].to_numpy(), rtol=1e-9,
+                                       err_msg=f"{col} at n={n}")
+
+
+def test_update_on_sliding_window_carries_state_forward():
+    full = random_frame()
+    inds = Indicators()
+    start = 50
+
+    # Fixed-size window moving forward one bar per call, like the live ring buffer.
+    # Bars that slide out stay folded into the saved state, so each call should equal a
+    # batch run over everything since the first window began.
+    for end in range(200, 230):
+        got = inds.update("ETH/USDT", full.iloc[end - 150:end].reset_index(drop=True))
+        want = Indicators.add_all(full.iloc[start:end].reset_index(drop=True))
+        for col in OUTPUT_COLS:
+            np.testing.assert_allclose(got[col].to_numpy(), want[col].to_numpy()[-150:], rtol=1e-9,
+                                       err_msg=f"{col} at end={end}")
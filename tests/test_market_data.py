@@ -0,0 +1,96 @@
+import asyncio
+import time
+import numpy as np
+from bot.data.market_data import MarketData
+from bot.exchange.websocket_client import BinanceWebSocketClient
+
+HOUR_MS = 3_600_000
+
+
+def klines(start, count):
+    """REST-shaped (n, 6) OHLCV rows for hourly bars starting at bar index start."""
+    idx = np.arange(start, start + count, dtype=np.float64)
+    return np.column_stack([idx * HOUR_MS, idx, idx + 1, idx - 1, idx, np.ones(count)])
+
+
+def kline_event(bar):
+    return {'e': 'kline', 's': 'BTCUSDT', 'k': {
+        'i': '1h', 't': bar * HOUR_MS, 'x': False,
+        'o': str(bar), 'h': str(bar + 1), 'l': str(bar - 1), 'c': str(bar), 'v': '1'}}
+
+
+class FakeRest:
+    def __init__(self):
+        self.calls = 0
+        self.last_bar = 0
+
+    async def fetch_ohlcv(self, symbol, timeframe, limit):
+        self.calls += 1
+        return klines(self.last_bar - limit + 1, limit)
+
+
+def live_stream(rest):
+    async def setup():
+        stream = BinanceWebSocketClient(max_candles=100)
+        await stream.initialize(["BTC/USDT"], ["1h"])
+        market = MarketData(client=rest, stream=stream)
+        rest.last_bar = 199
+        await stream.preload_candles("BTC/USDT", "1h", await market.get_candles("BTC/USDT", "1h", 100))
+        stream._running = stream._connected = True
+        await stream._process_message(kline_event(199))
+        return stream, market
+    return setup()
+
+
+def test_connected_fresh_buffer_is_served_without_rest():
+    async def run():
+        rest = FakeRest()
+        stream, market = await live_stream(rest)
+        rest.calls = 0
+
+        df = await market.get_candles("BTC/USDT", "1h", 100)
+        assert rest.calls == 0
+        assert df['close'].iloc[-1] == 199
+
+    asyncio.run(run())
+
+
+def test_stale_buffer_falls_back_to_rest():
+    async def run():
+        rest = FakeRest()
+        stream, market = await live_stream(rest)
+        rest.calls = 0
+
+        # Connected but silent for longer than one candle
+        stream._ring("BTC/USDT", "1h").updated_at = time.time() - 2 * 3600
+        await market.get_candles("BTC/USDT", "1h", 100)
+        assert rest.calls == 1
+
+    asyncio.run(run())
+
+
+def test_reconnect_gap_is_backfilled_over_rest():
+    async def run():
+        rest = FakeRest()
+        stream, market = await live_stream(rest)
+
+        # Bars 200-204 go by while the socket is down; the stream resumes at 205
+        stream._mark_disconnected()
+        assert not stream.is_live("BTC/USDT", "1h")
+        stream._connected = True
+        await stream._process_message(kline_event(205))
+        assert stream.needs_backfill("BTC/USDT", "1h")
+
+        rest.calls = 0
+        rest.last_bar = 205
+        df = await market.get_candles("BTC/USDT", "1h", 100)
+        assert rest.calls == 1
+        assert np.array_equal(df['close'].to_numpy(), np.arange(106, 206))
+
+        # The buffer now holds the refilled series and serves the next read
+        assert not stream.needs_backfill("BTC/USDT", "1h")
+        again = await market.get_candles("BTC/USDT", "1h", 100)
+        assert rest.calls == 1
+        assert np.array_equal(again['close'].to_numpy(), np.arange(106, 206))
+
+    asyncio.run(run())